@@ -1,9 +1,12 @@
 """
 Módulo de Animações para Vaporwave Windows
-Contém todas as animações de transição de imagens
+Contém todas as animações de transição de imagens, conduzidas pelo relógio
+de animação compartilhado pelas janelas
 """
 
-from PySide6.QtCore import QPropertyAnimation, QEasingCurve, QRect
+from PySide6.QtCore import QEasingCurve, QRect
+
+from relogio import Transicao
 
 
 def _criar_animacao_wipe(janela, caminho, direcao):
@@ -50,14 +53,14 @@ def _criar_animacao_wipe(janela, caminho, direcao):
         rect_in_fim = QRect(x0, y0, largura_orig, altura_orig)
 
     # Wipe out
-    anim_wipe_out = QPropertyAnimation(janela.label_overlay, b"geometry", janela)
+    anim_wipe_out = Transicao(janela.relogio, janela.overlay, b"geometry", janela)
     anim_wipe_out.setDuration(600)
     anim_wipe_out.setStartValue(rect_inicio)
     anim_wipe_out.setEndValue(rect_fim)
     anim_wipe_out.setEasingCurve(QEasingCurve.InQuad)
 
     # Fade out
-    anim_out = QPropertyAnimation(janela.opacity_effect, b"opacity", janela)
+    anim_out = Transicao(janela.relogio, janela.overlay, b"opacidade", janela)
     anim_out.setDuration(600)
     anim_out.setStartValue(1.0)
     anim_out.setEndValue(0.0)
@@ -65,17 +68,17 @@ def _criar_animacao_wipe(janela, caminho, direcao):
 
     def after_out():
         janela._carregar_fonte(caminho)
-        janela.label_overlay.setGeometry(rect_reload)
+        janela.overlay.setGeometry(rect_reload)
 
         # Wipe in
-        anim_wipe_in = QPropertyAnimation(janela.label_overlay, b"geometry", janela)
+        anim_wipe_in = Transicao(janela.relogio, janela.overlay, b"geometry", janela)
         anim_wipe_in.setDuration(600)
         anim_wipe_in.setStartValue(rect_in_inicio)
         anim_wipe_in.setEndValue(rect_in_fim)
         anim_wipe_in.setEasingCurve(QEasingCurve.OutQuad)
 
         # Fade in
-        anim_in = QPropertyAnimation(janela.opacity_effect, b"opacity", janela)
+        anim_in = Transicao(janela.relogio, janela.overlay, b"opacidade", janela)
         anim_in.setDuration(600)
         anim_in.setStartValue(0.0)
         anim_in.setEndValue(1.0)
@@ -91,7 +94,7 @@ def _criar_animacao_wipe(janela, caminho, direcao):
 
 def animar_fade(janela, caminho):
     """Fade: desvanece até 20%, volta ao normal."""
-    anim_out = QPropertyAnimation(janela.opacity_effect, b"opacity", janela)
+    anim_out = Transicao(janela.relogio, janela.overlay, b"opacidade", janela)
     anim_out.setDuration(800)
     anim_out.setStartValue(1.0)
     anim_out.setEndValue(0.2)
@@ -99,7 +102,7 @@ def animar_fade(janela, caminho):
 
     def after_out():
         janela._carregar_fonte(caminho)
-        anim_in = QPropertyAnimation(janela.opacity_effect, b"opacity", janela)
+        anim_in = Transicao(janela.relogio, janela.overlay, b"opacidade", janela)
         anim_in.setDuration(600)
         anim_in.setStartValue(0.2)
         anim_in.setEndValue(1.0)
@@ -112,7 +115,7 @@ def animar_fade(janela, caminho):
 
 def animar_slide(janela, caminho):
     """Slide: fade rápido (300ms out/in)."""
-    anim_out = QPropertyAnimation(janela.opacity_effect, b"opacity", janela)
+    anim_out = Transicao(janela.relogio, janela.overlay, b"opacidade", janela)
     anim_out.setDuration(300)
     anim_out.setStartValue(1.0)
     anim_out.setEndValue(0.0)
@@ -120,7 +123,7 @@ def animar_slide(janela, caminho):
 
     def after_out():
         janela._carregar_fonte(caminho)
-        anim_in = QPropertyAnimation(janela.opacity_effect, b"opacity", janela)
+        anim_in = Transicao(janela.relogio, janela.overlay, b"opacidade", janela)
         anim_in.setDuration(300)
         anim_in.setStartValue(0.0)
         anim_in.setEndValue(1.0)
@@ -150,6 +153,18 @@ def animar_wipe_right(janela, caminho):
     _criar_animacao_wipe(janela, caminho, 'right')
 
 
+# Duração total (saída + entrada) de cada animação, em ms
+DURACOES = {
+    "fade": 1400,
+    "slide": 600,
+
+    "wipe_top": 1200,
+    "wipe_bottom": 1200,
+    "wipe_left": 1200,
+    "wipe_right": 1200,
+}
+
+
 # Dicionário para mapeamento de nomes para funções
 ANIMACOES = {
     "fade": animar_fade,
@@ -162,6 +177,11 @@ ANIMACOES = {
 }
 
 
+def duracao_animacao(tipo_animacao):
+    """Duração total da animação, usando o fade como fallback."""
+    return DURACOES.get(tipo_animacao, DURACOES["fade"])
+
+
 def executar_animacao(tipo_animacao, janela, caminho):
     """Executa a animação correspondente ao tipo."""
     if tipo_animacao in ANIMACOES:
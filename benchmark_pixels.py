@@ -0,0 +1,152 @@
+"""
+Micro-benchmark do pipeline de pixels de um quadro de animação
+Mede cada etapa do caminho atual (quadro PIL -> QImage premultiplicada ->
+escala -> paint do OverlayChroma) e do caminho antigo como referência
+(quadro do QMovie -> RGBA8888 -> NumPy -> PIL -> LANCZOS -> putalpha ->
+QPixmap), mostra quantas cópias de buffer cada quadro faz antes e depois e
+compara a escala num buffer reaproveitado do anel com a alocação de uma
+QImage nova por quadro
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+projeto_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, projeto_path)
+
+import numpy as np
+from PIL import Image
+from PySide6.QtCore import Qt, QPoint
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QApplication
+
+from renderizacao import FORMATO, OverlayChroma, escalar_em, pil_para_qimage
+
+LARGURA, ALTURA = 3840, 2160       # quadro 4K como o Pillow entrega
+AREA_W, AREA_H = 1920, 1080        # área do chroma
+REPETICOES = 5
+
+
+def _quadro_pil():
+    """Quadro RGBA como FonteAnimada.proximo devolve depois de compor."""
+    arr = np.random.default_rng(0).integers(0, 256, (ALTURA, LARGURA, 4), dtype=np.uint8)
+    arr[..., 3] = 255
+    return Image.fromarray(arr, "RGBA")
+
+
+def _quadro_qmovie():
+    """Quadro como o QMovie entregava ao caminho antigo (ARGB32 premultiplicado)."""
+    arr = np.random.default_rng(0).integers(0, 256, (ALTURA, LARGURA, 4), dtype=np.uint8)
+    arr[..., 3] = 255
+    return QImage(arr.data, LARGURA, ALTURA, LARGURA * 4, FORMATO).copy()
+
+
+def _mascara():
+    mask = np.ones((AREA_H, AREA_W), dtype=bool)
+    mask[:40, :] = False
+    return mask
+
+
+def _overlay(mascara):
+    overlay = OverlayChroma()
+    overlay.resize(AREA_W, AREA_H)
+    overlay.definir_mascara(QPoint(0, 0), mascara)
+    return overlay
+
+
+# Cada etapa: (descrição, copia o quadro inteiro?, função)
+def etapas_antigas(quadro, mascara):
+    """Caminho de antes da troca para ARGB32 premultiplicado, só como referência."""
+    estado = {}
+    mask_img = Image.fromarray(mascara.astype(np.uint8) * 255)
+    return [
+        ("convertToFormat(RGBA8888)", True,
+         lambda: estado.update(q=quadro.convertToFormat(QImage.Format_RGBA8888))),
+        ("bits().tobytes()", True,
+         lambda: estado.update(b=estado["q"].bits().tobytes())),
+        ("np.frombuffer", False,
+         lambda: estado.update(a=np.frombuffer(estado["b"], dtype=np.uint8).reshape((ALTURA, LARGURA, 4)))),
+        ("Image.fromarray", False,
+         lambda: estado.update(p=Image.fromarray(estado["a"]))),
+        ("current_frame.copy()", True,
+         lambda: estado.update(p=estado["p"].copy())),
+        ("resize LANCZOS", True,
+         lambda: estado.update(p=estado["p"].resize((AREA_W, AREA_H), Image.LANCZOS))),
+        ("Image.new + alpha_composite", True,
+         lambda: estado.update(c=_canvas_pil(estado["p"]))),
+        ("putalpha", False,
+         lambda: estado["c"].putalpha(mask_img)),
+        ("tobytes('raw', 'RGBA')", True,
+         lambda: estado.update(b=estado["c"].tobytes("raw", "RGBA"))),
+        ("QPixmap.fromImage (converte p/ premultiplicado)", True,
+         lambda: estado.update(pm=QPixmap.fromImage(QImage(estado["b"], AREA_W, AREA_H, QImage.Format_RGBA8888)))),
+    ]
+
+
+def _canvas_pil(img):
+    canvas = Image.new("RGBA", (AREA_W, AREA_H), (0, 0, 0, 0))
+    canvas.alpha_composite(img, (0, 0))
+    return canvas
+
+
+def etapas(quadro, overlay, reaproveitar):
+    estado = {}
+    buffer = QImage(AREA_W, AREA_H, FORMATO)
+    tela = QImage(AREA_W, AREA_H, FORMATO)
+    if reaproveitar:
+        escala = ("escalar_em (buffer do anel)", True,
+                  lambda: estado.update(e=escalar_em(buffer, estado["q"], True)))
+    else:
+        escala = ("QImage.scaled (buffer novo)", True,
+                  lambda: estado.update(e=estado["q"].scaled(AREA_W, AREA_H, Qt.IgnoreAspectRatio,
+                                                             Qt.SmoothTransformation)))
+    return [
+        ("pil_para_qimage (premultiplica no tobytes)", True,
+         lambda: estado.update(q=pil_para_qimage(quadro))),
+        escala,
+        ("definir_fonte (referencia a QImage)", False,
+         lambda: overlay.definir_fonte(estado["e"], QPoint(0, 0))),
+        ("paintEvent do OverlayChroma (fundo, quadro, máscara)", True,
+         lambda: overlay.render(tela)),
+    ]
+
+
+def medir(nome, etapas):
+    print(f"\n{nome}")
+    total_ms = 0.0
+    copias = 0
+    for descricao, copia, funcao in etapas:
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            funcao()
+        ms = (time.perf_counter() - inicio) * 1000 / REPETICOES
+        total_ms += ms
+        copias += copia
+        marca = "cópia" if copia else "  -  "
+        print(f"    [{marca}] {descricao:<52} {ms:8.2f} ms")
+    print(f"    Total: {copias} cópia(s) de buffer por quadro, {total_ms:.2f} ms")
+    return copias, total_ms
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    quadro = _quadro_pil()
+    mascara = _mascara()
+    overlay = _overlay(mascara)
+
+    print("=" * 60)
+    print(f"PIPELINE DE PIXELS - quadro {LARGURA}x{ALTURA} -> área {AREA_W}x{AREA_H}")
+    print("=" * 60)
+
+    copias_antes, ms_antes = medir("Antes (RGBA8888 -> NumPy -> PIL), referência:",
+                                   etapas_antigas(_quadro_qmovie(), mascara))
+    _, ms_novo = medir("Depois, buffer novo por quadro:", etapas(quadro, overlay, reaproveitar=False))
+    copias_depois, ms_anel = medir("Depois, buffer reaproveitado do anel:", etapas(quadro, overlay, reaproveitar=True))
+
+    print("\n" + "=" * 60)
+    print(f"Cópias por quadro: {copias_antes} -> {copias_depois}")
+    print(f"Tempo por quadro:  {ms_antes:.1f} ms -> {ms_novo:.1f} ms (buffer novo) -> {ms_anel:.1f} ms (anel)")
+    print("=" * 60)
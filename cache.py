@@ -0,0 +1,464 @@
+"""
+Caches de renderização do Vaporwave Windows
+Guardam resultados prontos para que quadros repetidos não sejam recalculados,
+por janela e compartilhados entre janelas em memória e, entre execuções, em disco
+"""
+
+import hashlib
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+
+from PIL import Image
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage
+
+import pacotes
+from renderizacao import abrir_imagem, cobre, mascara_para_qimage, pil_para_qpixmap
+
+
+class CacheQuadros:
+    """Quadros de uma animação já escalados e mascarados para a área do chroma.
+
+    Os quadros só valem para uma combinação de parâmetros de renderização
+    (a chave); quando a chave muda o cache é esvaziado. O consumo é contado
+    em bytes de pixels (largura x altura x 4) e nunca passa de limite_bytes.
+    """
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.chave = None
+        self.total_quadros = 0
+        self.bytes_usados = 0
+        self._quadros = {}  # número do quadro -> (QImage, atraso em ms)
+
+    def limpar(self):
+        self.chave = None
+        self.bytes_usados = 0
+        self._quadros.clear()
+
+    def validar(self, chave):
+        """Esvazia o cache se os parâmetros de renderização mudaram."""
+        if chave != self.chave:
+            self.limpar()
+            self.chave = chave
+
+    def obter(self, numero):
+        item = self._quadros.get(numero)
+        return item[0] if item else None
+
+    def atraso(self, numero):
+        item = self._quadros.get(numero)
+        return item[1] if item else 0
+
+    def cabe(self, largura, altura):
+        """A animação inteira, com quadros desse tamanho, cabe no limite.
+        Quando não cabe, nenhum quadro é guardado: a reprodução segue pelo
+        BufferQuadros sem prender memória num cache que nunca completaria."""
+        return self.total_quadros * largura * altura * 4 <= self.limite_bytes
+
+    def guardar(self, numero, quadro, atraso):
+        """Guarda o quadro se couber no limite; retorna False caso contrário."""
+        if numero in self._quadros:
+            return True
+        tamanho = quadro.width() * quadro.height() * 4
+        if self.bytes_usados + tamanho > self.limite_bytes:
+            return False
+        self._quadros[numero] = (quadro, atraso)
+        self.bytes_usados += tamanho
+        return True
+
+    def completo(self):
+        """Todos os quadros da animação estão prontos para reprodução."""
+        return self.total_quadros > 0 and len(self._quadros) >= self.total_quadros
+
+
+class BufferQuadros:
+    """Anel de quadros já escalados, decodificados à frente da reprodução.
+
+    Guarda no máximo capacidade(largura, altura) quadros (limite_bytes
+    dividido pelo tamanho de um quadro, nunca menos que 2), então a memória
+    depende do limite e não do número de quadros da animação. Quadros que
+    saem da tela voltam como buffers livres e são reaproveitados na escala
+    dos seguintes; buffers de outro tamanho são descartados.
+    """
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self._prontos = deque()  # (número, QImage, atraso) na ordem de exibição
+        self._livres = []
+
+    def __len__(self):
+        return len(self._prontos)
+
+    def limpar(self):
+        self._prontos.clear()
+        self._livres.clear()
+
+    def capacidade(self, largura, altura):
+        return max(2, self.limite_bytes // (largura * altura * 4))
+
+    def vagas(self, largura, altura):
+        return self.capacidade(largura, altura) - len(self._prontos)
+
+    def colocar(self, numero, quadro, atraso):
+        self._prontos.append((numero, quadro, atraso))
+
+    def retirar(self):
+        """Próximo quadro a exibir, ou None se a decodificação ficou para trás."""
+        return self._prontos.popleft() if self._prontos else None
+
+    def livre(self, largura, altura):
+        """Buffer livre do tamanho pedido, ou None."""
+        while self._livres:
+            buffer = self._livres.pop()
+            if buffer.width() == largura and buffer.height() == altura:
+                return buffer
+        return None
+
+    def devolver(self, quadro):
+        """Quadro que saiu da tela; vira buffer livre se ainda houver espaço."""
+        if len(self._prontos) + len(self._livres) < self.capacidade(quadro.width(), quadro.height()):
+            self._livres.append(quadro)
+
+
+class TemplatePronto:
+    """Template num tamanho já com o chroma preparado (ver preparar_chroma).
+
+    Os pixmaps das versões com e sem o verde são criados na primeira vez
+    que cada uma é exibida e ficam guardados: alternar a transparência (T)
+    só troca o pixmap do label. A máscara vai ao overlay como QImage Alpha8,
+    convertida uma vez só.
+    """
+
+    def __init__(self, template, rapido, area, slots, template_transparente, mascara):
+        self.template = template
+        self.rapido = rapido  # provisória (ver escalado), ainda sem refino
+        self.area = area
+        self.slots = slots
+        self.template_transparente = template_transparente
+        self.mascara = mascara
+        self.tamanho = template.size if template is not None else None
+        self._pixmaps = {}  # transparente? -> QPixmap
+        self._mascara_img = None
+        self._origem = None  # versão preparada da qual uma provisória foi escalada
+
+    def pixmap(self, transparente):
+        if transparente not in self._pixmaps:
+            if self._origem is not None:
+                largura, altura = self.tamanho
+                self._pixmaps[transparente] = self._origem.pixmap(transparente).scaled(
+                    largura, altura, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+            else:
+                base = self.template_transparente if transparente else self.template
+                self._pixmaps[transparente] = pil_para_qpixmap(base)
+        return self._pixmaps[transparente]
+
+    def mascara_img(self):
+        if self._mascara_img is None:
+            self._mascara_img = mascara_para_qimage(self.mascara)
+        return self._mascara_img
+
+    def escalado(self, largura, altura):
+        """Versão provisória em outro tamanho, para a interação: pixmaps e
+        máscara da versão preparada reamostrados pelo vizinho mais próximo no
+        Qt, área e slots na mesma proporção. Não passa por preparar_chroma,
+        então custa alguns milissegundos mesmo num template 4K; o refino
+        prepara o tamanho de verdade."""
+        if self._origem is not None:
+            return self._origem.escalado(largura, altura)  # sem acumular reamostragens
+        fx, fy = largura / self.tamanho[0], altura / self.tamanho[1]
+
+        def escalar(retangulo):
+            x0, y0, x1, y1 = retangulo
+            x0, y0 = round(x0 * fx), round(y0 * fy)
+            return x0, y0, max(x0 + 1, round(x1 * fx)), max(y0 + 1, round(y1 * fy))
+
+        area = escalar(self.area)
+        provisoria = TemplatePronto(None, True, area, [escalar(s) for s in self.slots], None, None)
+        provisoria.tamanho = (largura, altura)
+        provisoria._origem = self
+        provisoria._mascara_img = self.mascara_img().scaled(
+            area[2] - area[0], area[3] - area[1], Qt.IgnoreAspectRatio, Qt.FastTransformation)
+        return provisoria
+
+
+class CacheTemplate:
+    """Tamanhos recentes de um template e sua pirâmide mipmap.
+
+    A pirâmide guarda o template_base reduzido à metade a cada nível; um
+    redimensionamento parte do menor nível que ainda cobre o tamanho pedido,
+    então o LANCZOS processa bem menos pixels que a partir do original.
+    Os últimos max_tamanhos resultados ficam guardados (LRU) por tamanho.
+    preparar_tamanho não mexe no cache nem em widgets e pode rodar no pool;
+    guardar e obter ficam na thread da interface.
+    """
+
+    LADO_MINIMO = 64
+
+    def __init__(self, template_base, preparar, max_tamanhos=6):
+        self.preparar = preparar
+        self.max_tamanhos = max_tamanhos
+        self.niveis = [template_base]
+        while min(self.niveis[-1].size) // 2 >= self.LADO_MINIMO:
+            self.niveis.append(self.niveis[-1].reduce(2))
+        self._tamanhos = OrderedDict()  # (largura, altura) -> TemplatePronto
+
+    def nivel_para(self, largura, altura):
+        """Menor nível da pirâmide com pelo menos largura x altura."""
+        for nivel in reversed(self.niveis):
+            if nivel.width >= largura and nivel.height >= altura:
+                return nivel
+        return self.niveis[0]
+
+    def pronto_em(self, largura, altura):
+        """Versão já preparada do tamanho, ou None."""
+        pronto = self._tamanhos.get((largura, altura))
+        if pronto is not None:
+            self._tamanhos.move_to_end((largura, altura))
+        return pronto
+
+    def preparar_tamanho(self, largura, altura):
+        nivel = self.nivel_para(largura, altura)
+        template = nivel if nivel.size == (largura, altura) else nivel.resize((largura, altura), Image.LANCZOS)
+        pronto = TemplatePronto(template, False, *self.preparar(template))
+        if pronto.mascara is not None:
+            pronto.mascara_img()
+        return pronto
+
+    def guardar(self, pronto):
+        self._tamanhos[pronto.tamanho] = pronto
+        self._tamanhos.move_to_end(pronto.tamanho)
+        while len(self._tamanhos) > self.max_tamanhos:
+            self._tamanhos.popitem(last=False)
+        return pronto
+
+    def obter(self, largura, altura):
+        return self.pronto_em(largura, altura) or self.guardar(self.preparar_tamanho(largura, altura))
+
+
+class CacheImagens:
+    """Imagens decodificadas e suas versões escaladas, compartilhadas pelas janelas.
+
+    Janelas que apontam para o mesmo arquivo (mesma pasta, mesmo template)
+    decodificam uma vez só: a chave é a identidade do conteúdo (caminho real,
+    tamanho e mtime do arquivo), não o caminho como foi escrito. As versões
+    escaladas ficam por tamanho alvo. Tudo divide um único limite_bytes,
+    com LRU, e pode ser usado de várias threads do pool ao mesmo tempo.
+    As imagens devolvidas são compartilhadas e não devem ser alteradas.
+    """
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()  # chave -> (imagem, bytes)
+        self._lock = threading.Lock()
+        self._decodificando = {}     # identidade -> lock da decodificação em curso
+
+    @staticmethod
+    def identidade(caminho):
+        return pacotes.assinatura(caminho)
+
+    def _obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            self._itens.move_to_end(chave)
+            return item[0]
+
+    def _contar(self, acerto):
+        with self._lock:
+            if acerto:
+                self.acertos += 1
+            else:
+                self.falhas += 1
+
+    def _guardar(self, chave, imagem, tamanho):
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior:
+                self.bytes_usados -= anterior[1]
+            if tamanho > self.limite_bytes:
+                return
+            self._itens[chave] = (imagem, tamanho)
+            self.bytes_usados += tamanho
+            while self.bytes_usados > self.limite_bytes:
+                _, (_, liberado) = self._itens.popitem(last=False)
+                self.bytes_usados -= liberado
+
+    def decodificada(self, caminho, tamanho=None):
+        """Imagem PIL RGBA do arquivo (ver abrir_imagem). Uma decodificação
+        reduzida serve enquanto cobrir o tamanho pedido; senão é refeita maior
+        e toma o lugar da anterior. Pedidos simultâneos do mesmo conteúdo
+        esperam a primeira decodificação em vez de repeti-la."""
+        ident = self.identidade(caminho)
+        if ident is None:
+            return abrir_imagem(caminho, tamanho)  # deixa o erro de abertura subir
+        chave = ("decodificada", ident)
+        with self._lock:
+            trava = self._decodificando.setdefault(ident, threading.Lock())
+        with trava:
+            img = self._obter(chave)
+            if img is not None and (cobre(img, *tamanho) if tamanho else
+                                    img.size == img.info["tamanho_original"]):
+                self._contar(True)
+                return img
+            self._contar(False)
+            img = abrir_imagem(caminho, tamanho)
+            self._guardar(chave, img, img.width * img.height * 4)
+        with self._lock:
+            self._decodificando.pop(ident, None)
+        return img
+
+    def escalada(self, caminho, largura, altura, manter_proporcao, rapido):
+        """QImage já escalada para a área, ou None. A refinada serve também
+        para um pedido no modo rápido."""
+        ident = self.identidade(caminho)
+        if ident is not None:
+            for modo in ((False, True) if rapido else (False,)):
+                img = self._obter(("escalada", ident, largura, altura, manter_proporcao, modo))
+                if img is not None:
+                    self._contar(True)
+                    return img
+        self._contar(False)
+        return None
+
+    def guardar_escalada(self, caminho, largura, altura, manter_proporcao, rapido, imagem):
+        ident = self.identidade(caminho)
+        if ident is not None:
+            chave = ("escalada", ident, largura, altura, manter_proporcao, rapido)
+            self._guardar(chave, imagem, imagem.sizeInBytes())
+
+
+class CacheDisco:
+    """Quadros já escalados para a área do chroma, guardados em disco entre execuções.
+
+    A chave é caminho + mtime da fonte + tamanho da área + manter_proporcao,
+    então editar o arquivo ou mudar a janela gera outra entrada. Cada entrada
+    é um arquivo com os pixels crus (ARGB32 premultiplicado) de todos os
+    quadros e seus atrasos: carregar é só ler, sem decodificar nem escalar.
+    O total passa por LRU (data de último uso do arquivo) até caber em
+    limite_bytes. Pode ser usado de várias threads do pool ao mesmo tempo.
+    """
+
+    MAGICA = b"VWC1"
+    CABECALHO = struct.Struct("<4sI")        # mágica, número de quadros
+    QUADRO = struct.Struct("<IIIII")         # largura, altura, bytes por linha, formato, atraso
+
+    def __init__(self, pasta, limite_bytes):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        self._entradas = None  # nome do arquivo -> [bytes, último uso]; lido na 1ª vez
+        self.bytes_usados = 0
+
+    def _nome(self, caminho, largura, altura, manter_proporcao):
+        assinatura = pacotes.assinatura(caminho)  # arquivo comum ou membro de pacote
+        if assinatura is None:
+            return None
+        real, _, mtime = assinatura
+        ident = f"{real}|{mtime}|{largura}x{altura}|{int(bool(manter_proporcao))}"
+        return hashlib.sha1(ident.encode("utf-8")).hexdigest() + ".quadros"
+
+    def _carregar_indice(self):
+        if self._entradas is not None:
+            return
+        self._entradas = {}
+        try:
+            with os.scandir(self.pasta) as it:
+                for e in it:
+                    if e.name.endswith(".quadros") and e.is_file():
+                        st = e.stat()
+                        self._entradas[e.name] = [st.st_size, st.st_mtime]
+        except OSError:
+            pass
+        self.bytes_usados = sum(t for t, _ in self._entradas.values())
+
+    def ler(self, caminho, largura, altura, manter_proporcao):
+        """Lista [(QImage, atraso)] da entrada, ou None se não houver."""
+        nome = self._nome(caminho, largura, altura, manter_proporcao)
+        if nome is None:
+            return None
+        with self._lock:
+            self._carregar_indice()
+            if nome not in self._entradas:
+                return None
+            self._entradas[nome][1] = time.time()
+        arquivo = os.path.join(self.pasta, nome)
+        try:
+            with open(arquivo, "rb") as f:
+                magica, total = self.CABECALHO.unpack(f.read(self.CABECALHO.size))
+                if magica != self.MAGICA:
+                    raise ValueError("entrada inválida")
+                cabecalhos = [self.QUADRO.unpack(f.read(self.QUADRO.size)) for _ in range(total)]
+                quadros = []
+                for w, h, bpl, formato, atraso in cabecalhos:
+                    dados = f.read(bpl * h)
+                    if len(dados) != bpl * h:
+                        raise ValueError("entrada truncada")
+                    quadros.append((QImage(dados, w, h, bpl, QImage.Format(formato)).copy(), atraso))
+            os.utime(arquivo)
+            return quadros
+        except (OSError, ValueError, struct.error):
+            self._descartar(nome)
+            return None
+
+    def gravar(self, caminho, largura, altura, manter_proporcao, quadros):
+        """Guarda [(QImage, atraso)] de forma atômica (arquivo temporário + rename)."""
+        nome = self._nome(caminho, largura, altura, manter_proporcao)
+        if nome is None:
+            return
+        arquivo = os.path.join(self.pasta, nome)
+        temporario = f"{arquivo}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            with open(temporario, "wb") as f:
+                f.write(self.CABECALHO.pack(self.MAGICA, len(quadros)))
+                for img, atraso in quadros:
+                    f.write(self.QUADRO.pack(img.width(), img.height(), img.bytesPerLine(),
+                                             img.format().value, max(0, int(atraso))))
+                for img, _ in quadros:
+                    f.write(img.constBits())
+            tamanho = os.path.getsize(temporario)
+            os.replace(temporario, arquivo)
+        except OSError:
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._carregar_indice()
+            anterior = self._entradas.get(nome)
+            self.bytes_usados += tamanho - (anterior[0] if anterior else 0)
+            self._entradas[nome] = [tamanho, time.time()]
+            self._evictar()
+
+    def _evictar(self):
+        """Remove as entradas usadas há mais tempo até caber no limite (com o lock)."""
+        if self.bytes_usados <= self.limite_bytes:
+            return
+        for nome, _ in sorted(self._entradas.items(), key=lambda e: e[1][1]):
+            if self.bytes_usados <= self.limite_bytes:
+                break
+            tamanho, _ = self._entradas.pop(nome)
+            self.bytes_usados -= tamanho
+            try:
+                os.remove(os.path.join(self.pasta, nome))
+            except OSError:
+                pass
+
+    def _descartar(self, nome):
+        with self._lock:
+            entrada = self._entradas.pop(nome, None)
+            if entrada:
+                self.bytes_usados -= entrada[0]
+        try:
+            os.remove(os.path.join(self.pasta, nome))
+        except OSError:
+            pass
@@ -0,0 +1,143 @@
+"""
+Fontes animadas do Vaporwave Windows
+GIF, APNG e WebP animado passam pelo mesmo caminho: o suporte a múltiplos
+quadros do Pillow decodifica em sequência, um quadro por vez, para que a
+memória dependa do buffer de quadros prontos e não do tamanho da animação
+"""
+
+import struct
+import threading
+
+from PIL import Image
+from PySide6.QtGui import QImage
+
+import pacotes
+import remoto
+from renderizacao import FORMATO, escalar_em, pil_para_qimage
+
+# atrasos menores que isso são tratados como "sem atraso", como nos navegadores
+ATRASO_MINIMO_MS = 20
+ATRASO_PADRAO_MS = 100
+
+
+def eh_animada(caminho):
+    """O arquivo tem mais de um quadro. Todo GIF passa pela fonte animada;
+    PNG e WebP só quando o cabeçalho declara animação (chunk acTL antes dos
+    dados no APNG, flag de animação do VP8X no WebP). Lê só o cabeçalho, em
+    fluxo mesmo dentro de pacotes, então pode ser chamada na thread da
+    interface. O que não dá para ler sem custo conta como animado se o
+    formato permitir: uma URL ainda não baixada (que não vai à rede) e um
+    membro de pacote cujo índice ainda não foi montado. A fonte animada com
+    um quadro só é tratada como estática ao abrir, no pool."""
+    if remoto.eh_url(caminho):
+        local = remoto.cache_http.local(caminho)
+        if local is None:
+            return remoto.extensao_url(caminho).lower().endswith((".gif", ".png", ".webp"))
+        caminho = local
+    extensao = caminho.lower().rsplit(".", 1)[-1]
+    if extensao == "gif":
+        return True
+    if extensao not in ("png", "webp"):
+        return False
+    arquivo, membro = pacotes.dividir(caminho)
+    try:
+        if membro is None:
+            with open(caminho, "rb") as f:
+                return _cabecalho_animado(f, extensao)
+        pacote = pacotes.aberto(arquivo)
+        if pacote is None:
+            return True
+        with pacote.fluxo(membro) as f:
+            return _cabecalho_animado(f, extensao)
+    except (OSError, IndexError, struct.error):
+        pass
+    return False
+
+
+def _cabecalho_animado(f, extensao):
+    if extensao == "png":
+        return _png_animado(f)
+    cabecalho = f.read(21)
+    return cabecalho[:4] == b"RIFF" and cabecalho[8:16] == b"WEBPVP8X" and bool(cabecalho[20] & 0x02)
+
+
+def _png_animado(f):
+    if f.read(8) != b"\x89PNG\r\n\x1a\n":
+        return False
+    while True:
+        tamanho, tipo = struct.unpack(">I4s", f.read(8))
+        if tipo == b"acTL":
+            return True
+        if tipo in (b"IDAT", b"IEND"):
+            return False
+        f.seek(tamanho + 4, 1)  # dados + CRC
+
+
+def atraso_quadro(duracao):
+    """Atraso em ms de um quadro a partir do "duration" informado pelo Pillow."""
+    if not duracao or duracao < ATRASO_MINIMO_MS:
+        return ATRASO_PADRAO_MS
+    return int(duracao)
+
+
+class FonteAnimada:
+    """Quadros de um GIF, APNG ou WebP animado, lidos em sequência e em loop.
+
+    Só o quadro corrente fica decodificado: o Pillow compõe cada quadro sobre
+    o anterior segundo o disposal e o blend do formato. Abrir já conta os
+    quadros (o GIF inteiro é percorrido uma vez; o WebP é lido para a memória),
+    então deve rodar fora da thread da interface. Não é thread-safe: a janela
+    usa uma instância por vez, num único canal do Renderizador. fechar()
+    pode vir da thread da interface com um quadro sendo decodificado no pool:
+    o arquivo é fechado quando esse quadro terminar.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._img = Image.open(pacotes.abrir(caminho))
+        self.total_quadros = getattr(self._img, "n_frames", 1)
+        self.tamanho = self._img.size
+        self._proximo = 0
+        self._lock = threading.Lock()
+        self._decodificando = False
+        self._fechar = False
+
+    def proximo(self, numero=None):
+        """(número, quadro RGBA, atraso em ms) do quadro seguinte; depois do
+        último volta ao primeiro. Com numero, salta para esse quadro e segue
+        dali (o Pillow recompõe a partir do primeiro quadro se precisar)."""
+        with self._lock:
+            if self._fechar:
+                raise ValueError(f"{self.caminho} já foi fechada")
+            self._decodificando = True
+        try:
+            if numero is None:
+                numero = self._proximo
+            self._img.seek(numero)
+            quadro = self._img.convert("RGBA")
+            self._proximo = (numero + 1) % self.total_quadros
+            return numero, quadro, atraso_quadro(self._img.info.get("duration"))
+        finally:
+            with self._lock:
+                self._decodificando = False
+                if self._fechar:
+                    self._img.close()
+
+    def fechar(self):
+        """Fecha o arquivo; se um quadro estiver sendo decodificado, ao fim dele."""
+        with self._lock:
+            if self._fechar:
+                return
+            self._fechar = True
+            if not self._decodificando:
+                self._img.close()
+
+
+def decodificar_quadro(fonte, buffer, largura, altura, rapido, numero=None):
+    """Roda no pool: decodifica o quadro seguinte da fonte (ou o quadro
+    numero) e o escala para largura x altura no buffer dado, ou numa QImage
+    nova se buffer for None. Retorna (número, QImage, atraso)."""
+    numero, quadro, atraso = fonte.proximo(numero)
+    if buffer is None:
+        buffer = QImage(largura, altura, FORMATO)
+    return numero, escalar_em(buffer, pil_para_qimage(quadro), not rapido), atraso
@@ -1,20 +1,42 @@
 # vaporwave_window_manager.py
-import sys, os, json, random, logging
+import sys, os, json, logging, time
 from datetime import datetime
+from functools import partial
 import numpy as np
 from PIL import Image
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QSystemTrayIcon, QMenu, QMessageBox,
-    QGraphicsOpacityEffect, QFileDialog, QDialog, QFormLayout, QLineEdit,
+    QFileDialog, QDialog, QFormLayout, QLineEdit,
     QHBoxLayout, QPushButton, QCheckBox, QSpinBox, QComboBox, QStyle
 )
-from PySide6.QtGui import QPixmap, QImage, QMovie, QIcon, QAction, QKeySequence, QPainter, QPen, QColor, QPolygon
+from PySide6.QtGui import QPixmap, QIcon, QAction, QActionGroup, QKeySequence, QPainter, QPen, QColor, QPolygon
 from PySide6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QRect, QPoint, QPointF
-from animacoes import executar_animacao
+from animacoes import executar_animacao, duracao_animacao
 from painel import PainelControle
+from cache import BufferQuadros, CacheQuadros, CacheTemplate, CacheDisco, CacheImagens
+from fontes_animadas import FonteAnimada, decodificar_quadro, eh_animada
+from tarefas import Renderizador
+from relogio import Prazo, RelogioAnimacao
+from visibilidade import janela_visivel, sessao_ativa
+from orcamento import OrcamentoQuadros, PERFIS, PERFIL_PADRAO
+from persistencia import GravadorConfig
+from slideshow import FasesSlideshow, OrdemSlideshow, IndicePasta
+import pacotes
+import remoto
+from renderizacao import OverlayChroma, cobre, escalar_imagem, preparar_fonte, tamanho_escalado
 
 CONFIG_PATH = "config.json"
 LOG_PATH = "app.log"
+CACHE_PATH = "cache"
+LIMITE_CACHE_QUADROS = 64 * 1024 * 1024  # bytes de quadros de animação prontos por janela
+LIMITE_BUFFER_QUADROS = 16 * 1024 * 1024  # bytes de quadros decodificados à frente, por janela (padrão
+                                          # de "limite_buffer_quadros_mb" no config de cada janela)
+LIMITE_CACHE_DISCO = 512 * 1024 * 1024   # bytes de quadros escalados guardados em CACHE_PATH
+LIMITE_CACHE_IMAGENS = 256 * 1024 * 1024  # bytes de imagens compartilhadas entre as janelas
+FRACAO_MINIMA_SLOT = 1 / 1024  # do template; regiões verdes menores são resíduos (bordas da escala, texto sobre o verde)
+VERIFICACAO_VISIBILIDADE_MS = 1000  # intervalo entre verificações de quais janelas aparecem
+ATRASO_MAXIMO_MS = 1000  # animação mais atrasada que isso recomeça do agora em vez de descartar quadros
+ESPERA_REFINO_MS = 250  # ociosidade antes de renderizar de novo com LANCZOS
 
 # Configurar logging
 logging.basicConfig(
@@ -27,6 +49,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# quadros escalados entre execuções, compartilhados por todas as janelas
+cache_disco = CacheDisco(CACHE_PATH, LIMITE_CACHE_DISCO)
+
 # ---------------- util ----------------
 
 def carregar_config():
@@ -35,24 +60,80 @@ def carregar_config():
             return json.load(f)
     return {"janelas": {}}
 
-def salvar_config(cfg):
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, indent=4, ensure_ascii=False)
-
-def detectar_area_verde(img_pil):
-    arr = np.array(img_pil.convert("RGB"))
-    mask = (arr[:, :, 1] > 200) & (arr[:, :, 0] < 100) & (arr[:, :, 2] < 100)
-    coords = np.argwhere(mask)
-    if coords.size == 0:
-        return None
-    y0, x0 = coords.min(axis=0)
-    y1, x1 = coords.max(axis=0)
-    return (x0, y0, x1, y1)  # left, top, right, bottom
-
-def pil_to_qpixmap(pil_img):
-    data = pil_img.tobytes("raw", "RGBA")
-    qimg = QImage(data, pil_img.width, pil_img.height, QImage.Format_RGBA8888)
-    return QPixmap.fromImage(qimg)
+def mascara_verde(arr):
+    """Máscara booleana dos pixels de chroma key (verde) de um array RGB/RGBA."""
+    return (arr[:, :, 1] > 200) & (arr[:, :, 0] < 100) & (arr[:, :, 2] < 100)
+
+def _raiz(pais, i):
+    while pais[i] != i:
+        pais[i] = pais[pais[i]]
+        i = pais[i]
+    return i
+
+def rotular_areas_verdes(mask):
+    """Separa as regiões verdes do template (slots) por componentes conexos
+    (vizinhança de 8), em duas passadas sobre os trechos de cada linha: a
+    primeira une os trechos que se tocam com os da linha de cima num
+    union-find, a segunda junta os retângulos e as contagens por raiz.
+
+    Retorna [(left, top, right, bottom, pixels), ...] em ordem de leitura.
+    Regiões com menos de FRACAO_MINIMA_SLOT dos pixels do template (32 x 32
+    num template de 1024 x 1024: resíduos do LANCZOS nas bordas) são
+    descartadas; a maior fica sempre, para que um template reduzido a poucos
+    pixels continue com a sua área.
+    """
+    h, w = mask.shape
+    borda = np.zeros((h, w + 2), dtype=np.int8)
+    borda[:, 1:-1] = mask
+    mudancas = np.diff(borda, axis=1)
+    linhas, inicios = np.nonzero(mudancas == 1)   # em ordem de linha, como os fins
+    _, fins = np.nonzero(mudancas == -1)          # trecho [início, fim) da linha
+    linhas, inicios, fins = linhas.tolist(), inicios.tolist(), fins.tolist()
+    pais = list(range(len(linhas)))
+    anterior, atual = [], []  # índices dos trechos da linha de cima e da atual
+    k = 0
+    for i, (y, a, b) in enumerate(zip(linhas, inicios, fins)):
+        if i and y != linhas[i - 1]:
+            anterior = atual if y == linhas[i - 1] + 1 else []
+            atual, k = [], 0
+        atual.append(i)
+        # tocam (inclusive na diagonal) os trechos de cima com fim >= a e início <= b
+        while k < len(anterior) and fins[anterior[k]] < a:
+            k += 1
+        j = k
+        while j < len(anterior) and inicios[anterior[j]] <= b:
+            ra, rb = _raiz(pais, i), _raiz(pais, anterior[j])
+            if ra != rb:
+                pais[ra] = rb
+            j += 1
+        if j > k:
+            k = j - 1  # o último pode tocar também o próximo trecho desta linha
+    regioes = {}
+    for i, (y, a, b) in enumerate(zip(linhas, inicios, fins)):
+        r = regioes.setdefault(_raiz(pais, i), [a, y, b - 1, y, 0])
+        r[0], r[2], r[3] = min(r[0], a), max(r[2], b - 1), y
+        r[4] += b - a
+    if not regioes:
+        return []
+    minimo = min(h * w * FRACAO_MINIMA_SLOT, max(r[4] for r in regioes.values()))
+    return sorted((tuple(r) for r in regioes.values() if r[4] >= minimo), key=lambda r: (r[1], r[0]))
+
+def preparar_chroma(template):
+    """Calcula uma única vez, para um template RGBA já no tamanho final,
+    a área do chroma (união dos slots), os slots, o template com o verde
+    transparente e a máscara booleana recortada que limita o overlay."""
+    arr = np.array(template)
+    mask = mascara_verde(arr)
+    slots = [r[:4] for r in rotular_areas_verdes(mask)]
+    area = None
+    mascara_overlay = None
+    if slots:
+        area = (min(s[0] for s in slots), min(s[1] for s in slots),
+                max(s[2] for s in slots), max(s[3] for s in slots))
+        x0, y0, x1, y1 = area
+        mascara_overlay = mask[y0:y1, x0:x1]
+    arr[mask] = [0, 0, 0, 0]
+    return area, slots, Image.fromarray(arr), mascara_overlay
 
 def center_on_primary(widget):
     screen = QApplication.primaryScreen().availableGeometry()
@@ -133,6 +214,13 @@ class WindowConfigDialog(QDialog):
         self.ed_pasta = QLineEdit()
         btn_pasta = QPushButton("Selecionar...")
         btn_pasta.clicked.connect(self.sel_pasta)
+        btn_pacote = QPushButton("Pacote...")
+        btn_pacote.clicked.connect(self.sel_pacote)
+
+        self.ed_slots = QLineEdit()
+        self.ed_slots.setPlaceholderText("uma imagem por área verde extra, separadas por ;")
+        btn_slots = QPushButton("Adicionar...")
+        btn_slots.clicked.connect(self.sel_slots)
 
         self.chk_loop = QCheckBox("Usar pasta em loop")
         self.spin_intervalo = QSpinBox()
@@ -151,11 +239,13 @@ class WindowConfigDialog(QDialog):
         form = QFormLayout()
         row_t = QHBoxLayout(); row_t.addWidget(self.ed_template); row_t.addWidget(btn_template)
         row_i = QHBoxLayout(); row_i.addWidget(self.ed_imagem); row_i.addWidget(btn_imagem)
-        row_p = QHBoxLayout(); row_p.addWidget(self.ed_pasta);   row_p.addWidget(btn_pasta)
+        row_p = QHBoxLayout(); row_p.addWidget(self.ed_pasta);   row_p.addWidget(btn_pasta); row_p.addWidget(btn_pacote)
+        row_s = QHBoxLayout(); row_s.addWidget(self.ed_slots);   row_s.addWidget(btn_slots)
 
         form.addRow("Template:", row_t)
         form.addRow("Imagem única:", row_i)
         form.addRow("Pasta de imagens:", row_p)
+        form.addRow("Imagens dos slots:", row_s)
         form.addRow(self.chk_loop)
         form.addRow("Intervalo (s):", self.spin_intervalo)
         form.addRow("Ordem:", self.cmb_ordem)
@@ -174,6 +264,7 @@ class WindowConfigDialog(QDialog):
             self.ed_template.setText(dados.get("caminho_template", ""))
             self.ed_imagem.setText(dados.get("caminho_imagem", ""))
             self.ed_pasta.setText(dados.get("pasta_imagens", ""))
+            self.ed_slots.setText("; ".join(dados.get("imagens_slots") or []))
             self.chk_loop.setChecked(dados.get("modo_loop", False))
             self.spin_intervalo.setValue(int(dados.get("intervalo", 5)))
             self.cmb_ordem.setCurrentText(dados.get("ordem", "alfabetica"))
@@ -186,18 +277,27 @@ class WindowConfigDialog(QDialog):
         if fn: self.ed_template.setText(fn)
 
     def sel_imagem(self):
-        fn, _ = QFileDialog.getOpenFileName(self, "Escolher imagem", "", "Imagens/GIF (*.png *.jpg *.jpeg *.bmp *.gif)")
+        fn, _ = QFileDialog.getOpenFileName(self, "Escolher imagem", "", "Imagens/animações (*.png *.jpg *.jpeg *.bmp *.gif *.webp)")
         if fn: self.ed_imagem.setText(fn)
 
     def sel_pasta(self):
         dn = QFileDialog.getExistingDirectory(self, "Escolher pasta de imagens", "")
         if dn: self.ed_pasta.setText(dn)
 
+    def sel_pacote(self):
+        fn, _ = QFileDialog.getOpenFileName(self, "Escolher pacote de imagens", "", "Pacotes (*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz)")
+        if fn: self.ed_pasta.setText(fn)
+
+    def sel_slots(self):
+        fns, _ = QFileDialog.getOpenFileNames(self, "Escolher imagens dos slots", "", "Imagens (*.png *.jpg *.jpeg *.bmp *.gif *.webp)")
+        if fns: self.ed_slots.setText("; ".join(self.dados()["imagens_slots"] + fns))
+
     def dados(self):
         return {
             "caminho_template": self.ed_template.text().strip(),
             "caminho_imagem": self.ed_imagem.text().strip(),
             "pasta_imagens": self.ed_pasta.text().strip() or None,
+            "imagens_slots": [c.strip() for c in self.ed_slots.text().split(";") if c.strip()],
             "modo_loop": self.chk_loop.isChecked(),
             "intervalo": int(self.spin_intervalo.value()),
             "ordem": self.cmb_ordem.currentText(),
@@ -209,7 +309,7 @@ class WindowConfigDialog(QDialog):
 # ------------- janela individual -------------
 
 class JanelaComChroma(QWidget):
-    def __init__(self, nome, cfg):
+    def __init__(self, nome, cfg, cache_imagens=None, relogio=None):
         super().__init__()
         self.nome = nome
         self.setWindowTitle(nome)
@@ -221,48 +321,108 @@ class JanelaComChroma(QWidget):
         self.caminho_template = cfg["caminho_template"]
         self.caminho_imagem   = cfg.get("caminho_imagem") or ""
         self.pasta_imagens    = cfg.get("pasta_imagens")
+        self.imagens_slots    = list(cfg.get("imagens_slots") or [])
         self.modo_loop        = bool(cfg.get("modo_loop", False))
         self.intervalo        = int(cfg.get("intervalo", 5))
         self.ordem            = cfg.get("ordem", "alfabetica")
         self.tipo_animacao    = cfg.get("tipo_animacao", "fade")
+        self.fase_slideshow   = cfg.get("fase_slideshow")  # ms, atribuída pelo AppManager no modo loop
         self.transparente     = bool(cfg.get("transparente", True))
         self.manter_proporcao = bool(cfg.get("manter_proporcao", False))
+        self.limite_buffer_mb = int(cfg.get("limite_buffer_quadros_mb", LIMITE_BUFFER_QUADROS // (1024 * 1024)))
 
         self.passo = 10
         self.offset_x = 0
         self.offset_y = 0
         self.z_order = int(cfg.get("z_order", 0))  # Ordem de camada
 
+        # qualidade em dois níveis: filtro rápido enquanto há interação,
+        # refino com LANCZOS quando a janela fica ociosa
+        self.modo_rapido = False
+        self._template_rapido = False
+        self._overlay_rapido = False
+        self.timer_refino = QTimer(self)
+        self.timer_refino.setSingleShot(True)
+        self.timer_refino.timeout.connect(self._refinar)
+
+        # imagens decodificadas e escaladas, compartilhadas com as outras janelas
+        # quando vem do AppManager
+        self.cache_imagens = cache_imagens or CacheImagens(LIMITE_CACHE_IMAGENS)
+        # quadros, trocas do slideshow e transições despertam pelo relógio do app
+        self.relogio = relogio or RelogioAnimacao(self)
+
         # mantém cópia base do template para evitar perda de qualidade
-        self.template_base = Image.open(self.caminho_template).convert("RGBA")
-        self.template = self.template_base.copy()
-        self.area_chroma = detectar_area_verde(self.template_base)
-        if not self.area_chroma:
-            raise ValueError(f"[{self.nome}] Área verde não detectada no template.")
+        self.template_base = self.cache_imagens.decodificada(self.caminho_template)
+        self.cache_template = CacheTemplate(self.template_base, preparar_chroma)
 
-        # camadas: imagem por baixo, template por cima
-        self.label_overlay = QLabel(self)
-        self.label_overlay.setAttribute(Qt.WA_TranslucentBackground, True)
-        self.opacity_effect = QGraphicsOpacityEffect(self.label_overlay)
-        self.opacity_effect.setOpacity(1.0)  # Define opacidade inicial como 100%
-        self.label_overlay.setGraphicsEffect(self.opacity_effect)
+        # camadas: imagem por baixo (pintada com QPainter), template por cima
+        self.overlay = OverlayChroma(self)
 
         self.label_template = QLabel(self)
         self.label_template.setAttribute(Qt.WA_TranslucentBackground, True)
 
-        self.movie = None
+        self._usar_template(self.cache_template.obter(*self.template_base.size))
+        if not self.area_chroma:
+            raise ValueError(f"[{self.nome}] Área verde não detectada no template.")
+
+        self.animada = False    # fonte principal é um GIF, APNG ou WebP animado
+        self.animacao = None    # FonteAnimada, quando precisa ser decodificada
         self.current_frame = None
 
+        # fonte principal já escalada: mover a imagem (setas) só reposiciona
+        self._fonte_escalada = None
+        self._escala_de = None
+        self._chave_fonte_escalada = None
+
+        # templates com várias áreas verdes: slot 0 recebe a fonte principal,
+        # os demais as imagens_slots (estáticas)
+        self.fontes_slots = {
+            slot: self.cache_imagens.decodificada(caminho)
+            for slot, caminho in enumerate(self.imagens_slots, start=1)
+            if os.path.exists(caminho)
+        }
+
+        # quadros de animação prontos; se ela inteira couber, após o primeiro
+        # ciclo a reprodução só troca pixmaps
+        self.cache_quadros = CacheQuadros(LIMITE_CACHE_QUADROS)
+        # senão é decodificada à frente num anel de buffers reutilizáveis
+        self.buffer_quadros = BufferQuadros(self.limite_buffer_mb * 1024 * 1024)
+        self._quadro_do_anel = None  # quadro do anel em exibição, devolvido na troca
+        self._aguardando_quadro = False
+        self.quadro_atual = 0
+        self._atrasos = {}          # número do quadro -> atraso, para saltar ao retomar
+        self._saltar_para = None    # quadro que a próxima decodificação deve buscar
+        self._geracao_quadros = 0   # muda a cada salto: quadros decodificados antes são descartados
+        self._fim_quadro = None     # instante do relógio em que o quadro exibido termina, no tempo da animação
+        self.timer_quadros = Prazo(self.relogio, self._avancar_quadro)
+
+        # medidas e limite do orçamento de quadros do AppManager
+        self.passo_minimo_ms = 0      # intervalo mínimo entre quadros exibidos (0 = livre)
+        self.custo_quadro_ms = 0.0    # média móvel do custo de um quadro na thread da interface
+        self.quadros_exibidos = 0     # desde a última avaliação do orçamento
+
+        # janela fora de qualquer tela, minimizada ou coberta: animação e
+        # slideshow pausados até ela voltar a aparecer
+        self.pausada = False
+        self._pausa = None  # (instante, ms até a próxima troca do slideshow)
+
+        # decodificação e escala fora da thread da interface
+        self.renderizador = Renderizador(self)
+        self._fonte_pendente = None  # caminho ainda sendo decodificado
+        self._prefetch = {}          # caminho -> (chave, resultado) das próximas do slideshow; resultado None se animada
+
         # render inicial
         self._render_template()
-        if self.caminho_imagem and os.path.exists(self.caminho_imagem):
+        if self.caminho_imagem and pacotes.pode_existir(self.caminho_imagem):
             self._carregar_fonte(self.caminho_imagem)
         self._render_overlay()
+        self._render_slots()
         self.label_template.raise_()
 
         # slideshow timer
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._trocar_imagem_timer)
+        self.ordem_slideshow = None
+        self.indice_pasta = None
+        self.timer = Prazo(self.relogio, self._trocar_imagem_timer, repetir=True)
 
         # tamanho e posição
         largura_cfg = int(cfg.get("largura", self.template.width))
@@ -295,129 +455,509 @@ class JanelaComChroma(QWidget):
 
     # ======= renderização =======
     def _aplicar_tamanho(self, largura, altura):
-        """Redimensiona template sem perda de qualidade."""
-        self.template = self.template_base.copy().resize((largura, altura), Image.LANCZOS)
-        self.area_chroma = detectar_area_verde(self.template)
+        """Template do tamanho pedido. Um tamanho já preparado vem do cache;
+        durante a interação um novo é o atual reamostrado pelo Qt (ver
+        TemplatePronto.escalado) e o refino o prepara no pool."""
+        pronto = self.cache_template.pronto_em(largura, altura)
+        if pronto is None:
+            if self.modo_rapido:
+                pronto = self.template_pronto.escalado(largura, altura)
+                self._preparar_template(largura, altura)
+            else:
+                pronto = self.cache_template.obter(largura, altura)
+        self._instalar_template(pronto)
+
+    def _instalar_template(self, pronto):
+        largura, altura = pronto.tamanho
+        if not pronto.area:
+            # reduzido a ponto de o verde sumir: segue com o template anterior
+            logger.warning(f"[{self.nome}] Sem área verde em {largura}x{altura}; mantendo o template anterior")
+            return
+        self._template_rapido = pronto.rapido
+        self._usar_template(pronto)
         self._render_template()
         self._render_overlay()
+        self._render_slots()
+
+    def _marcar_interacao(self, espera_ms=ESPERA_REFINO_MS):
+        """Passa a usar o filtro rápido e agenda o refino para depois de espera_ms sem interação."""
+        self.modo_rapido = True
+        self.timer_refino.start(max(espera_ms, self.timer_refino.remainingTime()))
+
+    def _refinar(self):
+        """Janela ociosa: refaz uma única vez em qualidade alta o que saiu com o filtro rápido."""
+        self.modo_rapido = False
+        if self._template_rapido:
+            pronto = self.cache_template.pronto_em(self.width(), self.height())
+            if pronto is not None:
+                self._instalar_template(pronto)
+            elif not self.renderizador.ocupado("template"):
+                self._preparar_template(self.width(), self.height())
+        elif self._overlay_rapido:
+            if not self.animada:
+                self._render_overlay()
+            self._render_slots()
+
+    def _preparar_template(self, largura, altura):
+        """Chroma do tamanho em qualidade alta no pool; o pedido mais novo vence."""
+        funcao = partial(self.cache_template.preparar_tamanho, largura, altura)
+        self.renderizador.pedir("template", funcao, partial(self._template_preparado, (largura, altura)))
+
+    def _template_preparado(self, chave, pronto):
+        self.cache_template.guardar(pronto)
+        if chave != (self.width(), self.height()):
+            return  # redimensionada de novo: o próximo refino pede o tamanho atual
+        self._instalar_template(pronto)
+
+    def _usar_template(self, pronto):
+        """Máscara, template transparente e área do chroma do tamanho atual,
+        reaproveitados por _render_template e _render_overlay."""
+        self.template_pronto = pronto
+        self.template = pronto.template
+        self.area_chroma, self.slots = pronto.area, pronto.slots
+        self.template_transparente, self.mascara_overlay = pronto.template_transparente, pronto.mascara
+        if self.area_chroma:
+            x0, y0, _, _ = self.area_chroma
+            self.overlay.definir_mascara(QPoint(x0, y0), pronto.mascara_img())
 
     def _render_template(self):
-        base = self.template.copy()
-        if self.transparente:
-            arr = np.array(base)
-            mask = (arr[:, :, 1] > 200) & (arr[:, :, 0] < 100) & (arr[:, :, 2] < 100)
-            arr[mask] = [0, 0, 0, 0]
-            base = Image.fromarray(arr)
-        pm = pil_to_qpixmap(base)
+        pm = self.template_pronto.pixmap(self.transparente)
         self.label_template.setPixmap(pm)
-        self.label_template.setGeometry(0, 0, base.width, base.height)
+        self.label_template.setGeometry(0, 0, pm.width(), pm.height())
         x0, y0, x1, y1 = self.area_chroma
-        self.label_overlay.setGeometry(x0, y0, x1 - x0, y1 - y0)
+        self.overlay.setGeometry(x0, y0, x1 - x0, y1 - y0)
         self.label_template.raise_()
 
     def _carregar_fonte(self, caminho):
-        if self.movie:
-            self.movie.frameChanged.disconnect(self._on_gif_frame)
-            self.movie.stop()
-            self.movie = None
+        self._fechar_animacao()
+        self.timer_quadros.stop()
+        self.cache_quadros.limpar()
+        self.buffer_quadros.limpar()
+        self._quadro_do_anel = None
+        self._aguardando_quadro = False
+        self._atrasos = {}
+        self._saltar_para = None
+        self._fim_quadro = None
+        self.renderizador.cancelar("quadro")
         self.caminho_imagem = caminho
-        if caminho.lower().endswith(".gif"):
-            self.movie = QMovie(caminho)
-            self.movie.frameChanged.connect(self._on_gif_frame)
-            self.movie.start()
+        # pré-carregada, ela já foi classificada no pool; senão basta o cabeçalho
+        prefetch = self._prefetch.pop(caminho, None)
+        self.animada = prefetch[1] is None if prefetch else eh_animada(caminho)
+        if self.animada:
+            self._fonte_pendente = None
+            # quadros prontos de uma execução anterior dispensam a decodificação;
+            # sem eles o arquivo é aberto (e seus quadros contados) no pool
+            x0, y0, x1, y1 = self._area_slot(0)
+            chave = (x1 - x0, y1 - y0, self.manter_proporcao, False)
+            funcao = partial(self._abrir_animacao, caminho, *chave[:3])
+            self.renderizador.pedir("fonte", funcao, partial(self._animacao_aberta, chave))
         else:
-            self.current_frame = Image.open(caminho).convert("RGBA")
+            if prefetch:
+                # pré-carregada durante o intervalo: a transição só troca o resultado
+                self._fonte_pendente = None
+                self.renderizador.cancelar("fonte")
+                self._fonte_pronta(*prefetch)
+                self._render_overlay()  # reescala se o tamanho mudou nesse meio tempo
+                return
+            # decodifica e escala no pool; até lá segue a imagem anterior,
+            # exceto no meio de uma transição, onde ela não deve reaparecer
+            self._fonte_pendente = caminho
+            if self.overlay.opacidade < 1.0:
+                self.overlay.limpar()
             self._render_overlay()
 
-    def _on_gif_frame(self, _):
-        img = self.movie.currentImage()
-        qimg = img.convertToFormat(QImage.Format_RGBA8888)
-        w, h = qimg.width(), qimg.height()
-        arr = np.frombuffer(qimg.bits().tobytes(), dtype=np.uint8).reshape((h, w, 4))
-        self.current_frame = Image.fromarray(arr)
-        self._render_overlay()
-
-    def _render_overlay(self):
-        if self.current_frame is None:
-            self.label_overlay.clear()
+    @staticmethod
+    def _abrir_animacao(caminho, largura, altura, manter_proporcao, usar_disco=True):
+        """Roda no pool: (quadros do cache em disco, None) ou (None, FonteAnimada)."""
+        quadros = cache_disco.ler(caminho, largura, altura, manter_proporcao) if usar_disco else None
+        if quadros:
+            return quadros, None
+        return None, FonteAnimada(caminho)
+
+    def _animacao_aberta(self, chave, resultado):
+        quadros, fonte = resultado
+        if (len(quadros) if quadros else fonte.total_quadros) == 1:
+            # eh_animada não pôde ler o cabeçalho e contou com animação: segue estática
+            if fonte is not None:
+                fonte.fechar()
+            self.animada = False
+            self._fonte_pendente = self.caminho_imagem
+            self._render_overlay()
             return
-
-        x0, y0, x1, y1 = self.area_chroma
-        cw, ch = x1 - x0, y1 - y0
-        img = self.current_frame.copy()
-
-        if self.manter_proporcao:
-            img.thumbnail((cw, ch), Image.LANCZOS)
+        if quadros:
+            self.cache_quadros.total_quadros = len(quadros)
+            self.cache_quadros.validar(chave)
+            self._atrasos = {n: atraso for n, (_, atraso) in enumerate(quadros)}
+            if all(self.cache_quadros.guardar(n, img, atraso) for n, (img, atraso) in enumerate(quadros)):
+                self.quadro_atual = 0
+                self._exibir_quadro(quadros[0][0])
+                self._agendar_quadro(self.relogio.agora(), quadros[0][1])
+                return
+            # o limite diminuiu desde a gravação: decodifica do arquivo
+            self.cache_quadros.limpar()
+            funcao = partial(self._abrir_animacao, self.caminho_imagem, *chave[:3], usar_disco=False)
+            self.renderizador.pedir("fonte", funcao, partial(self._animacao_aberta, chave))
+            return
+        self.animacao = fonte
+        self.cache_quadros.total_quadros = fonte.total_quadros
+        self._aguardando_quadro = True
+        self._decodificar_adiante()
+
+    def _fechar_animacao(self):
+        if self.animacao is not None:
+            self.renderizador.cancelar("quadro")
+            self.animacao.fechar()
+            self.animacao = None
+
+    def _decodificar_adiante(self):
+        """Pede ao pool o quadro seguinte enquanto houver vaga no anel. Os
+        quadros entram no cache se a animação inteira couber nele; senão
+        são escalados em buffers do anel que já saíram da tela."""
+        if self.animacao is None or self.pausada or self.renderizador.ocupado("quadro"):
+            return
+        chave = self._chave_escala()
+        if not self._escala_atende(self.cache_quadros.chave, chave):
+            self.cache_quadros.validar(chave)
+        if self.cache_quadros.completo():
+            return
+        x0, y0, x1, y1 = self._area_slot(0)
+        w, h = self._tamanho_escalado(*self.animacao.tamanho, x1 - x0, y1 - y0)
+        if self.buffer_quadros.vagas(w, h) <= 0:
+            return
+        guardar = chave == self.cache_quadros.chave and self.cache_quadros.cabe(w, h)
+        buffer = None if guardar else self.buffer_quadros.livre(w, h)
+        numero, self._saltar_para = self._saltar_para, None
+        funcao = partial(decodificar_quadro, self.animacao, buffer, w, h, self.modo_rapido, numero)
+        retorno = partial(self._quadro_decodificado, self.animacao, self._geracao_quadros, chave, guardar)
+        self.renderizador.pedir("quadro", funcao, retorno)
+
+    def _quadro_decodificado(self, fonte, geracao, chave, guardar, resultado):
+        if fonte is not self.animacao:
+            return
+        numero, quadro, atraso = resultado
+        self._atrasos[numero] = atraso
+        if geracao != self._geracao_quadros:
+            # decodificado antes de um salto: o anel recomeça do quadro novo
+            self._decodificar_adiante()
+            return
+        self.buffer_quadros.colocar(numero, quadro, atraso)
+        if guardar and chave == self.cache_quadros.chave:
+            self.cache_quadros.guardar(numero, quadro, atraso)
+            if self.cache_quadros.completo():
+                self._gravar_quadros_no_disco()
+        if self._aguardando_quadro:
+            self._aguardando_quadro = False
+            self._avancar_quadro()
         else:
-            img = img.resize((cw, ch), Image.LANCZOS)
-
-        img_w, img_h = img.size
-        px = min(max((cw - img_w)//2 + self.offset_x, 0), cw - img_w)
-        py = min(max((ch - img_h)//2 + self.offset_y, 0), ch - img_h)
-
-        # desenha dentro da área e mantém template acima
-        # cria imagem transparente
-        canvas = Image.new("RGBA", (cw, ch), (0, 0, 0, 0))
-        canvas.alpha_composite(img, (px, py))
-
-        # aplica máscara do template (limita área verde)
-        template_crop = self.template.crop((x0, y0, x1, y1))
-        mask_arr = np.array(template_crop.convert("RGB"))
-        mask = (mask_arr[:, :, 1] > 200) & (mask_arr[:, :, 0] < 100) & (mask_arr[:, :, 2] < 100)
-        mask_img = Image.fromarray((mask * 255).astype(np.uint8))
+            self._decodificar_adiante()
 
-        # aplica máscara como canal alfa
-        canvas.putalpha(mask_img)
+    def _gravar_quadros_no_disco(self):
+        """Ciclo refinado completo: grava os quadros para as próximas execuções."""
+        largura, altura, manter_proporcao, rapido = self.cache_quadros.chave
+        if rapido:
+            return
+        quadros = [(self.cache_quadros.obter(n), self.cache_quadros.atraso(n))
+                   for n in range(self.cache_quadros.total_quadros)]
+        funcao = partial(cache_disco.gravar, self.caminho_imagem, largura, altura, manter_proporcao, quadros)
+        self.renderizador.pedir("disco", funcao, lambda _: None)
+
+    def _avancar_quadro(self):
+        """Exibe o quadro que o tempo da animação pede e agenda o seguinte: do
+        cache, se completo para a escala atual, senão do anel decodificado à
+        frente. Quadros cujo tempo já passou (despertar atrasado, janela
+        limitada pelo orçamento) são descartados em vez de atrasar a animação."""
+        if self.pausada:
+            return
+        medida = time.perf_counter()
+        agora = self.relogio.agora()
+        inicio = self._fim_quadro
+        if inicio is None or agora - inicio > ATRASO_MAXIMO_MS:
+            inicio = agora
+        if self.cache_quadros.completo() and self._escala_atende(self.cache_quadros.chave, self._chave_escala()):
+            self.buffer_quadros.limpar()
+            self._quadro_do_anel = None
+            total = self.cache_quadros.total_quadros
+            numero = (self.quadro_atual + 1) % total
+            atraso = self.cache_quadros.atraso(numero)
+            while inicio + atraso <= agora:
+                inicio += atraso
+                numero = (numero + 1) % total
+                atraso = self.cache_quadros.atraso(numero)
+            self.quadro_atual = numero
+            self._exibir_quadro(self.cache_quadros.obter(numero))
+        else:
+            item = self.buffer_quadros.retirar()
+            if item is None:
+                # a decodificação ficou para trás: o quadro é exibido assim que chegar
+                self._aguardando_quadro = True
+                self._decodificar_adiante()
+                return
+            numero, quadro, atraso = item
+            while inicio + atraso <= agora and len(self.buffer_quadros):
+                self._devolver_ao_anel(numero, quadro)
+                inicio += atraso
+                numero, quadro, atraso = self.buffer_quadros.retirar()
+            if self._quadro_do_anel is not None:
+                self._devolver_ao_anel(self.quadro_atual, self._quadro_do_anel)
+            self._quadro_do_anel = quadro
+            self.quadro_atual = numero
+            self._exibir_quadro(quadro)
+            self._decodificar_adiante()
+        self._agendar_quadro(inicio, atraso)
+        self.quadros_exibidos += 1
+        custo = (time.perf_counter() - medida) * 1000 + self.overlay.custo_pintura_ms
+        self.custo_quadro_ms += (custo - self.custo_quadro_ms) * 0.2
+
+    def _agendar_quadro(self, inicio, atraso):
+        """O quadro exibido começou em inicio (tempo da animação) e dura
+        atraso; o seguinte entra no fim dele, mas nunca antes de
+        passo_minimo_ms a partir de agora."""
+        self._fim_quadro = inicio + atraso
+        self.timer_quadros.disparar_em(max(self._fim_quadro, self.relogio.agora() + self.passo_minimo_ms))
+
+    def _devolver_ao_anel(self, numero, quadro):
+        """Buffer que saiu da tela volta ao anel, a menos que seja do cache."""
+        if self.cache_quadros.obter(numero) is not quadro:
+            self.buffer_quadros.devolver(quadro)
+
+    def _chave_escala(self):
+        """Parâmetros que invalidam a fonte escalada e os quadros de animação prontos.
+        O deslocamento não entra: ele é aplicado só na hora de pintar."""
+        x0, y0, x1, y1 = self._area_slot(0)
+        return (x1 - x0, y1 - y0, self.manter_proporcao, self.modo_rapido)
 
-        self.label_overlay.setPixmap(pil_to_qpixmap(canvas))
-        self.label_template.raise_()
+    def _render_overlay(self):
+        """Fonte estática: reaproveita a versão escalada ou pede outra ao pool.
+        Animações se atualizam sozinhas no próximo quadro."""
+        if self.animada:
+            return
+        origem = self._fonte_pendente or self.current_frame
+        if origem is None:
+            self.overlay.limpar()
+            return
+        x0, y0, x1, y1 = self._area_slot(0)
+        if not isinstance(origem, str) and not cobre(origem, x1 - x0, y1 - y0):
+            # decodificada reduzida para uma área menor: decodifica de novo do arquivo
+            origem = self.caminho_imagem
+        chave = self._chave_escala()
+        if origem is self._escala_de and self._escala_atende(self._chave_fonte_escalada, chave):
+            self._exibir_quadro(self._fonte_escalada)
+            return
+        funcao = partial(preparar_fonte, origem, x1 - x0, y1 - y0, self.manter_proporcao,
+                         self.modo_rapido, cache_disco, self.cache_imagens)
+        self.renderizador.pedir("fonte", funcao, partial(self._fonte_pronta, chave))
+
+    @staticmethod
+    def _escala_atende(pronta, pedida):
+        """Uma escala pronta serve para a pedida; a refinada também serve no modo rápido."""
+        return pronta is not None and pronta[:3] == pedida[:3] and (pedida[3] or not pronta[3])
+
+    def _fonte_pronta(self, chave, resultado):
+        self._fonte_pendente = None
+        self.current_frame, self._fonte_escalada = resultado
+        self._escala_de = self.current_frame
+        self._chave_fonte_escalada = chave
+        self._overlay_rapido = chave[-1]
+        self._exibir_quadro(self._fonte_escalada)
+
+    def _reposicionar(self):
+        """Só o deslocamento mudou: move o quadro já escalado, sem reamostrar."""
+        pm = self.overlay.fonte(0)
+        if pm is not None:
+            self._exibir_quadro(pm)
+
+    def _area_slot(self, slot):
+        """Retângulo do slot; sem imagens extras a fonte principal ocupa a área toda."""
+        if len(self.slots) > 1 and self.fontes_slots:
+            return self.slots[slot]
+        return tuple(self.area_chroma)
+
+    def _exibir_quadro(self, pm, slot=0):
+        """Entrega o quadro escalado ao overlay, que recorta e pinta no paintEvent."""
+        ax0, ay0, _, _ = self.area_chroma
+        x0, y0, x1, y1 = self._area_slot(slot)
+        cw, ch = x1 - x0, y1 - y0
+        dx, dy = (self.offset_x, self.offset_y) if slot == 0 else (0, 0)
+        img_w, img_h = pm.width(), pm.height()
+        px = min(max((cw - img_w)//2 + dx, 0), cw - img_w)
+        py = min(max((ch - img_h)//2 + dy, 0), ch - img_h)
+        self.overlay.definir_fonte(pm, QPoint(x0 - ax0 + px, y0 - ay0 + py), slot)
+
+    def _render_slots(self):
+        """Imagens dos slots extras; o overlay as compõe no mesmo paint da principal."""
+        for slot, img in self.fontes_slots.items():
+            if slot >= len(self.slots):
+                self.overlay.limpar(slot)
+                continue
+            x0, y0, x1, y1 = self.slots[slot]
+            funcao = partial(escalar_imagem, img, x1 - x0, y1 - y0, self.manter_proporcao, self.modo_rapido)
+            self.renderizador.pedir(f"slot{slot}", funcao, partial(self._exibir_quadro, slot=slot))
+
+    def _tamanho_escalado(self, w, h, cw, ch):
+        return tamanho_escalado(w, h, cw, ch, self.manter_proporcao)
+
+    # ======= visibilidade =======
+    def esta_visivel(self):
+        return janela_visivel(self, self._area_slot(0))
+
+    def pausar(self):
+        """Para quadros e trocas enquanto a janela não aparece; o pool deixa de
+        decodificar porque ninguém mais consome o anel."""
+        if self.pausada:
+            return
+        self.pausada = True
+        self._pausa = (self.relogio.agora(), self.timer.remainingTime() if self.timer.isActive() else None)
+        self.timer_quadros.stop()
+        self.timer.stop()
+        logger.info(f"[{self.nome}] Pausada: não está visível")
+
+    def retomar(self):
+        """Volta a tocar no ponto em que estaria se nunca tivesse pausado."""
+        if not self.pausada:
+            return
+        self.pausada = False
+        inicio, ate_troca = self._pausa
+        decorrido = self.relogio.agora() - inicio
+        logger.info(f"[{self.nome}] Retomada após {decorrido / 1000:.1f}s")
+        if ate_troca is not None:
+            intervalo = self.timer.intervalo
+            atraso = ate_troca - decorrido
+            if atraso > 0:
+                self.timer.adiar(atraso)
+            else:
+                # trocas perdidas: pula as imagens intermediárias e exibe a que estaria na tela
+                for _ in range(int(-atraso // intervalo)):
+                    self.ordem_slideshow.avancar()
+                self.timer.adiar(intervalo - (-atraso % intervalo))
+                self._trocar_imagem_timer()
+        if self.animada:
+            if self._aguardando_quadro:
+                self._decodificar_adiante()
+            elif self._fim_quadro is None:
+                self._avancar_quadro()
+            else:
+                self._saltar_quadros(self.relogio.agora() - self._fim_quadro)
+
+    def _saltar_quadros(self, atrasado):
+        """Retomada de uma animação atrasada em atrasado ms desde o quadro que
+        deveria ter entrado: com todos os atrasos conhecidos, vai direto ao
+        quadro certo (do cache ou decodificado a partir dele); senão segue do
+        seguinte."""
+        if atrasado < 0:
+            self.timer_quadros.disparar_em(self._fim_quadro)
+            return
+        total = self.cache_quadros.total_quadros
+        if not total or len(self._atrasos) < total:
+            self._avancar_quadro()
+            return
+        atrasado %= sum(self._atrasos.values())
+        numero = (self.quadro_atual + 1) % total
+        while atrasado >= self._atrasos[numero]:
+            atrasado -= self._atrasos[numero]
+            numero = (numero + 1) % total
+        if self.cache_quadros.completo() and self._escala_atende(self.cache_quadros.chave, self._chave_escala()):
+            self.quadro_atual = numero
+            self._exibir_quadro(self.cache_quadros.obter(numero))
+            self._agendar_quadro(self.relogio.agora() - atrasado, self._atrasos[numero])
+            return
+        # anel: o que foi decodificado à frente ficou velho; o quadro certo
+        # começou há atrasado ms
+        self._fim_quadro = self.relogio.agora() - atrasado
+        self.buffer_quadros.limpar()
+        self._quadro_do_anel = None
+        self._geracao_quadros += 1
+        self._saltar_para = numero
+        self._aguardando_quadro = True
+        self._decodificar_adiante()
 
     # ======= slideshow =======
     def iniciar_slideshow(self):
-        if not self.pasta_imagens or not os.path.isdir(self.pasta_imagens):
+        pasta = self.pasta_imagens
+        if not pasta or not (os.path.isdir(pasta) or pacotes.eh_pacote(pasta) or remoto.eh_url(pasta)):
             return
-        exts = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp")
-        lista = [os.path.join(self.pasta_imagens, f)
-                 for f in os.listdir(self.pasta_imagens)
-                 if f.lower().endswith(exts)]
-        if not lista:
-            return
-        if self.ordem == "aleatoria":
-            random.shuffle(lista)
-        else:
-            lista.sort()
-        self.lista_imagens = lista
-        self.index_imagem = 0
-        # Carrega a primeira imagem diretamente, sem animação
-        self._trocar_para(lista[self.index_imagem], usar_fade=False)
-        self.timer.start(self.intervalo * 1000)
+        # o índice começa vazio e é lido no pool: a primeira imagem entra sem
+        # animação quando a leitura chega (_pasta_mudou), e a pasta segue
+        # observada para que arquivos novos entrem na sequência
+        self.indice_pasta = IndicePasta(self.pasta_imagens, self)
+        self.indice_pasta.mudou.connect(self._pasta_mudou)
+        self.ordem_slideshow = OrdemSlideshow(self.indice_pasta, aleatoria=self.ordem == "aleatoria")
+        self.timer.intervalo = self.intervalo * 1000
+        self.timer.adiar(self._espera_troca())
+
+    def _espera_troca(self):
+        """ms até a primeira troca: as trocas caem em instantes fixos do relógio
+        de parede (fase_slideshow + k * intervalo), os mesmos entre execuções,
+        e a primeira imagem fica pelo menos meio intervalo."""
+        intervalo = self.intervalo * 1000
+        espera = ((self.fase_slideshow or 0) - time.time() * 1000) % intervalo
+        return espera + intervalo if espera < intervalo / 2 else espera
+
+    def _pasta_mudou(self, adicionados, removidos):
+        """Aplica só a diferença da pasta (ids do índice), sem perder a posição do slideshow."""
+        self.ordem_slideshow.adicionar(adicionados)
+        for i in removidos:
+            self._prefetch.pop(self.indice_pasta.caminho(i), None)
+        logger.info(f"[{self.nome}] Pasta de imagens: {len(adicionados)} nova(s), {len(removidos)} removida(s)")
+        if self.ordem_slideshow.atual() is None and self.ordem_slideshow:
+            # primeira leitura, ou a pasta estava vazia: a imagem entra sem esperar o timer
+            self._trocar_para(self.ordem_slideshow.avancar(), usar_fade=False)
+        elif self.ordem_slideshow:
+            self._prefetch_proxima()
 
     def _trocar_imagem_timer(self):
-        if not hasattr(self, "lista_imagens") or not self.lista_imagens:
+        if not self.ordem_slideshow:
             return
-        self.index_imagem += 1
-        if self.index_imagem >= len(self.lista_imagens):
-            if self.ordem == "aleatoria":
-                random.shuffle(self.lista_imagens)
-            else:
-                self.lista_imagens.sort()
-            self.index_imagem = 0
         # Todas as trocas no loop devem ter animação
-        self._trocar_para(self.lista_imagens[self.index_imagem], usar_fade=True)
+        self._trocar_para(self.ordem_slideshow.avancar(), usar_fade=True)
+
+    def _prefetch_proxima(self):
+        """Decodifica e escala no pool a próxima imagem do slideshow enquanto
+        a atual é exibida; a troca no meio da transição só usa o resultado.
+        Animações remotas são só baixadas, para que a troca não espere a rede."""
+        caminho = self.ordem_slideshow.proximo()
+        if not caminho or caminho == self.caminho_imagem or caminho in self._prefetch:
+            return
+        x0, y0, x1, y1 = self._area_slot(0)
+        chave = (x1 - x0, y1 - y0, self.manter_proporcao, False)
+        funcao = partial(self._preparar_proxima, caminho, x1 - x0, y1 - y0, self.manter_proporcao, self.cache_imagens)
+        self.renderizador.pedir("prefetch", funcao, partial(self._prefetch_pronto, caminho, chave))
+
+    @staticmethod
+    def _preparar_proxima(caminho, largura, altura, manter_proporcao, imagens):
+        """Roda no pool: baixa a URL ou monta o índice do pacote, classifica
+        pelo cabeçalho e, se for estática, decodifica e escala; None se for
+        animada (que só fica baixada, para a troca não esperar a rede)."""
+        if remoto.eh_url(caminho):
+            remoto.cache_http.baixar(caminho)
+        arquivo, membro = pacotes.dividir(caminho)
+        if membro is not None:
+            pacotes.pacote(arquivo)
+        if eh_animada(caminho):
+            return None
+        return preparar_fonte(caminho, largura, altura, manter_proporcao, False, cache_disco, imagens)
+
+    def _prefetch_pronto(self, caminho, chave, resultado):
+        # a troca em andamento pode ainda não ter usado a anterior: guarda as duas últimas
+        self._prefetch[caminho] = (chave, resultado)
+        while len(self._prefetch) > 2:
+            self._prefetch.pop(next(iter(self._prefetch)))
 
     def _trocar_para(self, caminho, usar_fade=True):
         if not usar_fade:
             self._carregar_fonte(caminho)
-            return
-        
-        # Usar módulo de animações externo
-        executar_animacao(self.tipo_animacao, self, caminho)
+        else:
+            # Usar módulo de animações externo; durante a transição o filtro é o rápido
+            self._marcar_interacao(duracao_animacao(self.tipo_animacao) + ESPERA_REFINO_MS)
+            executar_animacao(self.tipo_animacao, self, caminho)
+        if self.ordem_slideshow:
+            self._prefetch_proxima()
     
     # ======= redimensionamento =======
     def _redimensionar(self, fator):
         """Ajusta tamanho da janela mantendo qualidade."""
         if fator <= 0:
             return
+        self._marcar_interacao()
         new_w = max(50, int(self.width() * fator))
         new_h = max(50, int(self.height() * fator))
         self.resize(new_w, new_h)
@@ -440,19 +980,26 @@ class JanelaComChroma(QWidget):
             self.move(ev.globalPosition().toPoint() - self._drag_off)
 
     def keyPressEvent(self, ev):
+        # cada tecla refaz só o que mudou: setas apenas reposicionam a imagem
         k = ev.key()
-        if   k == Qt.Key_Up:    self.offset_y -= self.passo
-        elif k == Qt.Key_Down:  self.offset_y += self.passo
-        elif k == Qt.Key_Left:  self.offset_x -= self.passo
-        elif k == Qt.Key_Right: self.offset_x += self.passo
+        if   k == Qt.Key_Up:    self.offset_y -= self.passo; self._reposicionar()
+        elif k == Qt.Key_Down:  self.offset_y += self.passo; self._reposicionar()
+        elif k == Qt.Key_Left:  self.offset_x -= self.passo; self._reposicionar()
+        elif k == Qt.Key_Right: self.offset_x += self.passo; self._reposicionar()
         elif k == Qt.Key_T:     self.transparente = not self.transparente; self._render_template()
-        elif k == Qt.Key_R:     self.manter_proporcao = not self.manter_proporcao
+        elif k == Qt.Key_R:     self._alternar_proporcao()
         elif k in (Qt.Key_Plus, Qt.Key_Equal):      self._redimensionar(1.1)
         elif k in (Qt.Key_Minus, Qt.Key_Underscore):self._redimensionar(0.9)
         elif ev.matches(QKeySequence.New):          self.criar_nova()
-        elif ev.matches(QKeySequence("Ctrl+E")):    self.editar_config()
-        elif ev.matches(QKeySequence("Ctrl+Delete")): self.excluir()
+        elif ev.keyCombination() == QKeySequence("Ctrl+E")[0]:      self.editar_config()
+        elif ev.keyCombination() == QKeySequence("Ctrl+Delete")[0]: self.excluir()
+        else: super().keyPressEvent(ev)
+
+    def _alternar_proporcao(self):
+        self._marcar_interacao()
+        self.manter_proporcao = not self.manter_proporcao
         self._render_overlay()
+        self._render_slots()
 
     def moveEvent(self, _):
         AppManager.instance().salvar_estado(self)
@@ -462,6 +1009,9 @@ class JanelaComChroma(QWidget):
 
     def closeEvent(self, e):
         AppManager.instance().salvar_estado(self)
+        self.timer_quadros.stop()
+        self.timer.stop()
+        self._fechar_animacao()
         e.accept()
 
     # ======= persistência =======
@@ -470,12 +1020,15 @@ class JanelaComChroma(QWidget):
             "caminho_template": self.caminho_template,
             "caminho_imagem": self.caminho_imagem,
             "pasta_imagens": self.pasta_imagens,
+            "imagens_slots": self.imagens_slots,
             "modo_loop": self.modo_loop,
             "intervalo": self.intervalo,
             "ordem": self.ordem,
             "tipo_animacao": self.tipo_animacao,
+            "fase_slideshow": self.fase_slideshow,
             "transparente": self.transparente,
             "manter_proporcao": self.manter_proporcao,
+            "limite_buffer_quadros_mb": self.limite_buffer_mb,
             "pos_x": self.x(),
             "pos_y": self.y(),
             "largura": self.width(),
@@ -501,9 +1054,18 @@ class AppManager:
     def __init__(self, app):
         self.app = app
         self.cfg = carregar_config()
+        # moveEvent/resizeEvent só marcam a janela; o arquivo é gravado depois, no pool
+        self.gravador = GravadorConfig(CONFIG_PATH, self.cfg, self._coletar_estado)
+        self.app.aboutToQuit.connect(self.gravador.descarregar)
         self.janelas = {}  # nome -> JanelaComChroma
         self.janelas_moviveis = self.cfg.get("janelas_moviveis", False)  # Global: padrão fixado
         self.painel_controle = None  # Instância do painel de controle
+        self.cache_imagens = CacheImagens(LIMITE_CACHE_IMAGENS)  # decodificações compartilhadas
+        self.fases = FasesSlideshow()  # trocas de slideshow escalonadas entre as janelas
+        self.relogio = RelogioAnimacao()  # um despertar por quadro da tela para todas as janelas
+        # teto de quadros por segundo e de uso da interface (perfil eco, equilibrado ou qualidade)
+        self.orcamento = OrcamentoQuadros(self.relogio, lambda: self.janelas.values(),
+                                          self.cfg.get("perfil_desempenho", PERFIL_PADRAO))
         AppManager._inst = self
 
         # tray
@@ -522,12 +1084,23 @@ class AppManager:
         self.act_about = QAction("Sobre", self.menu); self.act_about.triggered.connect(self.show_about)
         self.act_quit = QAction("Sair", self.menu); self.act_quit.triggered.connect(self.sair)
 
+        self.menu_desempenho = QMenu("Desempenho", self.menu)
+        self.grupo_desempenho = QActionGroup(self.menu_desempenho)
+        for perfil in PERFIS:
+            act = QAction(f"{perfil.capitalize()} ({PERFIS[perfil][0]} quadros/s)", self.menu_desempenho)
+            act.setCheckable(True)
+            act.setChecked(perfil == self.orcamento.perfil)
+            act.triggered.connect(lambda _=False, p=perfil: self.definir_perfil(p))
+            self.grupo_desempenho.addAction(act)
+            self.menu_desempenho.addAction(act)
+
         self.menu.addAction(self.act_painel)
         self.menu.addSeparator()
         self.menu.addAction(self.act_new)
         self.menu.addAction(self.act_edit)
         self.menu.addAction(self.act_del)
         self.menu.addAction(self.act_move)
+        self.menu.addMenu(self.menu_desempenho)
         self.menu.addSeparator()
         self.menu.addAction(self.act_help)
         self.menu.addAction(self.act_about)
@@ -552,9 +1125,25 @@ class AppManager:
 
         self.carregar_todas()
 
+        # janelas que não aparecem (monitor desconectado, minimizadas, cobertas,
+        # sessão bloqueada ou ociosa) param de animar
+        self.timer_visibilidade = QTimer()
+        self.timer_visibilidade.timeout.connect(self.verificar_visibilidade)
+        self.timer_visibilidade.start(VERIFICACAO_VISIBILIDADE_MS)
+        self.app.screenAdded.connect(lambda _: QTimer.singleShot(0, self.verificar_visibilidade))
+        self.app.screenRemoved.connect(lambda _: QTimer.singleShot(0, self.verificar_visibilidade))
+
     @classmethod
     def instance(cls): return cls._inst
 
+    def verificar_visibilidade(self):
+        ativa = sessao_ativa()
+        for w in self.janelas.values():
+            if ativa and w.esta_visivel():
+                w.retomar()
+            else:
+                w.pausar()
+
     def abrir_painel(self):
         """Abre ou traz para frente o painel de controle"""
         if self.painel_controle is None or not self.painel_controle.isVisible():
@@ -574,7 +1163,7 @@ class AppManager:
                 if not os.path.exists(dados["caminho_template"]):
                     QMessageBox.critical(None, "Erro", "Template inválido.")
                     return  # não encerrar, apenas retornar
-                img = Image.open(dados["caminho_template"]).convert("RGBA")
+                img = Image.open(dados["caminho_template"])  # só o cabeçalho, para o tamanho
                 nome = self._proximo_nome()
                 base = {
                     **dados,
@@ -583,7 +1172,7 @@ class AppManager:
                     "z_order": 0
                 }
                 self.cfg["janelas"] = {nome: base}
-                salvar_config(self.cfg)
+                self.gravador.marcar()
             else:
                 return  # não encerrar, usuário pode criar depois pelo tray
 
@@ -656,11 +1245,16 @@ class AppManager:
                 logger.info(f"{nome} não foi removida, será ignorada")
         
         # Salvar config atualizado
-        salvar_config(self.cfg)
+        self.gravador.marcar()
         logger.info(f"Aplicação iniciada com {janelas_carregadas} janela(s) carregada(s) e {len(janelas_falhadas)} janela(s) processada(s)")
 
     def _instanciar(self, nome, jcfg):
-        w = JanelaComChroma(nome, jcfg)
+        if jcfg.get("modo_loop"):
+            intervalo_ms = int(jcfg.get("intervalo", 5)) * 1000
+            jcfg["fase_slideshow"] = self.fases.atribuir(nome, intervalo_ms, jcfg.get("fase_slideshow"))
+        else:
+            self.fases.remover(nome)
+        w = JanelaComChroma(nome, jcfg, self.cache_imagens, self.relogio)
         self.janelas[nome] = w
         w.show()
 
@@ -713,8 +1307,15 @@ class AppManager:
 
     # salvar estado de uma
     def salvar_estado(self, w: JanelaComChroma):
-        self.cfg["janelas"][w.nome] = w.to_dict()
-        salvar_config(self.cfg)
+        self.gravador.marcar(w.nome)
+
+    def _coletar_estado(self, nomes):
+        """Chamado pelo gravador: copia para o cfg o estado das janelas marcadas
+        que continuam abertas (as excluídas já saíram do cfg)."""
+        for nome in nomes:
+            w = self.janelas.get(nome)
+            if w is not None:
+                self.cfg["janelas"][nome] = w.to_dict()
 
     # criar via diálogo
     def criar_via_dialog(self, base: JanelaComChroma | None = None):
@@ -726,7 +1327,7 @@ class AppManager:
         if not os.path.exists(dados["caminho_template"]):
             QMessageBox.critical(None, "Erro", "Template inválido.")
             return
-        img = Image.open(dados["caminho_template"]).convert("RGBA")
+        img = Image.open(dados["caminho_template"])  # só o cabeçalho, para o tamanho
         nome = self._proximo_nome()
         
         # Obter maior z_order atual para colocar nova janela na frente
@@ -746,7 +1347,7 @@ class AppManager:
             novo["pos_x"] = 0; novo["pos_y"] = 0
 
         self.cfg["janelas"][nome] = novo
-        salvar_config(self.cfg)
+        self.gravador.marcar()
         self._instanciar(nome, novo)
         
         # Recarregar painel se aberto
@@ -785,10 +1386,13 @@ class AppManager:
             "altura": altura,
             "z_order": z_order_atual
         }
+        if w.fase_slideshow is not None and novo_config.get("intervalo") == w.intervalo:
+            novo_config["fase_slideshow"] = w.fase_slideshow  # mesma cadência, mesma fase
+        novo_config.setdefault("limite_buffer_quadros_mb", w.limite_buffer_mb)  # não está no diálogo
         
         # Atualizar configuração e salvar
         self.cfg["janelas"][nome_janela] = novo_config
-        salvar_config(self.cfg)
+        self.gravador.marcar()
         
         # Recriar janela com nova configuração
         self._instanciar(nome_janela, novo_config)
@@ -817,9 +1421,10 @@ class AppManager:
         if not w: return
         w.close()
         del self.janelas[nome]
+        self.fases.remover(nome)
         if nome in self.cfg["janelas"]:
             del self.cfg["janelas"][nome]
-            salvar_config(self.cfg)
+            self.gravador.marcar()
         
         # Recarregar painel se aberto
         if self.painel_controle and self.painel_controle.isVisible():
@@ -832,7 +1437,13 @@ class AppManager:
         self.act_move.setText("Fixar Janelas" if self.janelas_moviveis else "Desfixar Janelas")
         # Salvar no JSON
         self.cfg["janelas_moviveis"] = self.janelas_moviveis
-        salvar_config(self.cfg)
+        self.gravador.marcar()
+
+    def definir_perfil(self, perfil):
+        self.orcamento.definir_perfil(perfil)
+        self.cfg["perfil_desempenho"] = self.orcamento.perfil
+        self.gravador.marcar()
+        logger.info(f"Perfil de desempenho: {self.orcamento.perfil}")
 
     def show_help(self):
         texto = (
@@ -867,6 +1478,13 @@ class AppManager:
     def sair(self):
         for w in list(self.janelas.values()):
             self.salvar_estado(w)
+        c = self.cache_imagens
+        logger.info(f"Cache de imagens: {c.acertos} acertos, {c.falhas} falhas, "
+                    f"{c.bytes_usados / (1024 * 1024):.1f} MiB em uso")
+        logger.info(f"Relógio de animação: {self.relogio.despertares} despertares "
+                    f"({1000 / self.relogio.periodo_ms:.0f} Hz)")
+        self.gravador.descarregar()
+        logger.info(f"Config gravado {self.gravador.gravacoes} vez(es) nesta execução")
         self.app.quit()
 
 # ---------------- main ----------------
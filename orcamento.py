@@ -0,0 +1,103 @@
+"""
+Orçamento de quadros do Vaporwave Windows
+Mede quanto cada janela custa por quadro na thread da interface e, quando a
+soma passa do teto do perfil, limita a taxa de quadros das janelas mais ao
+fundo primeiro, para que arrastar janelas e abrir diálogos não trave
+"""
+
+import logging
+
+from PySide6.QtCore import QObject, QTimer
+
+logger = logging.getLogger(__name__)
+
+# perfil -> (quadros por segundo do relógio, fração da thread da interface para animações)
+PERFIS = {
+    "eco": (15, 0.10),
+    "equilibrado": (30, 0.25),
+    "qualidade": (60, 0.50),
+}
+PERFIL_PADRAO = "equilibrado"
+
+# divisor do teto de quadros do perfil em cada nível de limitação (None = livre):
+# no "equilibrado" uma janela limitada toca a 15, 7,5 e 3,75 quadros/s
+DIVISOR_POR_NIVEL = (None, 2, 4, 8)
+AVALIACAO_MS = 1000
+FOLGA = 0.6  # abaixo de FOLGA * teto, uma janela limitada volta um nível
+
+
+class OrcamentoQuadros(QObject):
+    """Teto de quadros por segundo e de uso da thread da interface.
+
+    O teto de quadros vai para o relógio de animação: nenhum despertar
+    acontece mais rápido que ele, e quadros de GIF que vencem entre dois
+    despertares são descartados pela janela, não atrasados. O teto de uso é
+    verificado a cada AVALIACAO_MS com o custo médio por quadro
+    (custo_quadro_ms: preparar o quadro e pintar o overlay) vezes os quadros
+    exibidos no período. Estourou: as janelas de menor z_order sobem de nível
+    (fps_maximo dividido por DIVISOR_POR_NIVEL) até a estimativa caber. Sobrou folga: a janela
+    limitada de maior z_order volta um nível por avaliação, sem oscilar.
+    """
+
+    def __init__(self, relogio, janelas, perfil=PERFIL_PADRAO, parent=None):
+        super().__init__(parent)
+        self.relogio = relogio
+        self._janelas = janelas  # função que devolve as janelas abertas
+        self.niveis = {}         # janela -> nível de limitação
+        self.carga = 0.0         # fração da thread da interface medida na última avaliação
+        self.definir_perfil(perfil)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.avaliar)
+        self._timer.start(AVALIACAO_MS)
+
+    def definir_perfil(self, perfil):
+        if perfil not in PERFIS:
+            logger.warning(f"Perfil de desempenho desconhecido: {perfil}; usando {PERFIL_PADRAO}")
+            perfil = PERFIL_PADRAO
+        self.perfil = perfil
+        self.fps_maximo, self.cpu_maximo = PERFIS[perfil]
+        self.relogio.definir_fps_maximo(self.fps_maximo)
+        for janela in list(self.niveis):
+            self._aplicar(janela, 0)
+
+    def quadros_no_nivel(self, nivel):
+        """Quadros por segundo de uma janela no nível; None se livre."""
+        divisor = DIVISOR_POR_NIVEL[nivel]
+        return self.fps_maximo / divisor if divisor else None
+
+    def _aplicar(self, janela, nivel):
+        if nivel:
+            self.niveis[janela] = nivel
+        else:
+            self.niveis.pop(janela, None)
+        fps = self.quadros_no_nivel(nivel)
+        janela.passo_minimo_ms = 1000 / fps if fps else 0
+
+    def avaliar(self):
+        janelas = [j for j in self._janelas() if j.animada and not j.pausada]
+        for janela in list(self.niveis):
+            if janela not in janelas:
+                self._aplicar(janela, 0)  # pausada, fechada ou sem animação: sai livre
+        segundos = AVALIACAO_MS / 1000
+        custos = {}  # janela -> (ms por quadro, quadros por segundo)
+        for janela in janelas:
+            custos[janela] = (janela.custo_quadro_ms, janela.quadros_exibidos / segundos)
+            janela.quadros_exibidos = 0
+        self.carga = sum(ms * fps for ms, fps in custos.values()) / 1000
+        if self.carga > self.cpu_maximo:
+            carga = self.carga
+            for janela in sorted(custos, key=lambda j: j.z_order):
+                nivel = self.niveis.get(janela, 0)
+                if nivel + 1 >= len(DIVISOR_POR_NIVEL):
+                    continue
+                ms, fps = custos[janela]
+                limite = self.quadros_no_nivel(nivel + 1)
+                carga -= ms * max(0, fps - limite) / 1000
+                self._aplicar(janela, nivel + 1)
+                logger.info(f"[{janela.nome}] Limitada a {limite:g} quadros/s "
+                            f"(carga {self.carga:.0%}, teto {self.cpu_maximo:.0%})")
+                if carga <= self.cpu_maximo:
+                    break
+        elif self.carga < self.cpu_maximo * FOLGA and self.niveis:
+            janela = max(self.niveis, key=lambda j: j.z_order)
+            self._aplicar(janela, self.niveis[janela] - 1)
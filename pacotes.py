@@ -0,0 +1,235 @@
+"""
+Pacotes de imagens do Vaporwave Windows
+Arquivos zip e tar servem como pasta de imagens ou como imagem única sem
+serem extraídos: um índice dos membros é montado uma vez por pacote e cada
+imagem é lida direto do arquivo. Um membro é referenciado como
+"pacote.zip::pasta/imagem.png". URLs HTTP(S) também passam por aqui e
+são abertas a partir do cache em disco de remoto
+"""
+
+import io
+import os
+import tarfile
+import threading
+import zipfile
+from contextlib import contextmanager
+
+import remoto
+
+SEPARADOR = "::"
+EXTENSOES_PACOTE = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+def dividir(caminho):
+    """(pacote, membro) de um caminho dentro de pacote; (caminho, None) para arquivos comuns."""
+    arquivo, separador, membro = caminho.partition(SEPARADOR)
+    if separador and arquivo.lower().endswith(EXTENSOES_PACOTE):
+        return arquivo, membro
+    return caminho, None
+
+
+def juntar(pacote, membro):
+    return f"{pacote}{SEPARADOR}{membro}"
+
+
+def eh_pacote(caminho):
+    return bool(caminho) and caminho.lower().endswith(EXTENSOES_PACOTE) and os.path.isfile(caminho)
+
+
+class Pacote:
+    """Índice dos membros de um zip ou tar, montado uma vez ao abrir.
+
+    Num zip o índice é o diretório central, então ler um membro é um seek
+    (e nada a descomprimir se ele estiver armazenado sem compressão). Num
+    tar o arquivo é percorrido uma vez para achar os cabeçalhos; tar
+    comprimido funciona, mas cada leitura pode precisar descomprimir desde o
+    início. Leituras de threads diferentes são seguras.
+
+    Quando o arquivo muda, pacote() abre um novo e descarta este: ele é
+    fechado assim que a última leitura em curso terminar, e quem ainda tiver
+    a referência antiga lê do novo.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.mtime_ns = os.stat(caminho).st_mtime_ns
+        self._lock = threading.Lock()
+        self._uso = threading.Lock()  # protege _leitores e _descartado
+        self._leitores = 0
+        self._descartado = False
+        if zipfile.is_zipfile(caminho):
+            self._zip, self._tar = zipfile.ZipFile(caminho), None
+            self.membros = {i.filename: i for i in self._zip.infolist() if not i.is_dir()}
+        else:
+            self._zip, self._tar = None, tarfile.open(caminho)
+            self.membros = {m.name: m for m in self._tar.getmembers() if m.isfile()}
+
+    def tamanho(self, membro):
+        info = self.membros[membro]
+        return info.file_size if self._zip else info.size
+
+    def ler(self, membro):
+        """Bytes do membro; FileNotFoundError se ele não estiver no pacote."""
+        if not self._entrar():
+            return pacote(self.caminho).ler(membro)
+        try:
+            info = self._info(membro)
+            if self._zip:
+                return self._zip.read(info)  # o ZipFile já serializa o acesso ao arquivo
+            with self._lock:
+                return self._tar.extractfile(info).read()
+        finally:
+            self._sair()
+
+    @contextmanager
+    def fluxo(self, membro):
+        """Arquivo do membro lido sob demanda, para quem só precisa do
+        cabeçalho. Num tar o arquivo fica travado enquanto o fluxo está aberto."""
+        if not self._entrar():
+            with pacote(self.caminho).fluxo(membro) as f:
+                yield f
+            return
+        try:
+            info = self._info(membro)
+            if self._zip:
+                with self._zip.open(info) as f:
+                    yield f
+            else:
+                with self._lock:
+                    yield self._tar.extractfile(info)
+        finally:
+            self._sair()
+
+    def _info(self, membro):
+        info = self.membros.get(membro)
+        if info is None:
+            raise FileNotFoundError(f"{membro} não está em {self.caminho}")
+        return info
+
+    def _entrar(self):
+        """Registra uma leitura; False se o pacote já foi descartado."""
+        with self._uso:
+            if self._descartado:
+                return False
+            self._leitores += 1
+            return True
+
+    def _sair(self):
+        with self._uso:
+            self._leitores -= 1
+            fechar = self._descartado and not self._leitores
+        if fechar:
+            self._fechar()
+
+    def descartar(self):
+        """Substituído por uma versão mais nova do arquivo: fecha agora ou
+        quando a última leitura em curso terminar."""
+        with self._uso:
+            self._descartado = True
+            fechar = not self._leitores
+        if fechar:
+            self._fechar()
+
+    def _fechar(self):
+        (self._zip or self._tar).close()
+
+
+_pacotes = {}  # caminho -> Pacote, reaberto quando o arquivo muda
+_lock = threading.Lock()
+
+
+def pacote(caminho):
+    """Pacote aberto e indexado, compartilhado pelo processo. Pacotes
+    corrompidos levantam OSError, como arquivos que não existem."""
+    mtime = os.stat(caminho).st_mtime_ns
+    with _lock:
+        aberto = _pacotes.get(caminho)
+        if aberto is None or aberto.mtime_ns != mtime:
+            try:
+                novo = Pacote(caminho)
+            except (zipfile.BadZipFile, tarfile.TarError) as e:
+                raise OSError(f"Pacote inválido {caminho}: {e}") from e
+            if aberto is not None:
+                aberto.descartar()  # o anterior fecha quando ninguém mais o estiver lendo
+            aberto = _pacotes[caminho] = novo
+        return aberto
+
+
+def aberto(caminho):
+    """O pacote se ele já estiver aberto e em dia; None se abri-lo exigiria
+    montar o índice (o que pode descomprimir um tar inteiro)."""
+    try:
+        mtime = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        aberto = _pacotes.get(caminho)
+    return aberto if aberto is not None and aberto.mtime_ns == mtime else None
+
+
+def listar(caminho):
+    """Nomes de todos os membros (arquivos) do pacote; vazio se não puder ser lido."""
+    try:
+        return list(pacote(caminho).membros)
+    except OSError:
+        return []
+
+
+def abrir(caminho):
+    """O que o Image.open aceita: o próprio caminho para arquivos comuns,
+    os bytes do membro num BytesIO para caminhos dentro de pacote e o
+    arquivo baixado para URLs (bloqueia na rede: só no pool)."""
+    if remoto.eh_url(caminho):
+        return remoto.cache_http.baixar(caminho)
+    arquivo, membro = dividir(caminho)
+    if membro is None:
+        return caminho
+    return io.BytesIO(pacote(arquivo).ler(membro))
+
+
+def existe(caminho):
+    """URLs contam como existentes: só o download no pool pode dizer."""
+    if remoto.eh_url(caminho):
+        return True
+    arquivo, membro = dividir(caminho)
+    if membro is None:
+        return os.path.exists(caminho)
+    try:
+        return membro in pacote(arquivo).membros
+    except OSError:
+        return False
+
+
+def pode_existir(caminho):
+    """existe sem montar índices, para a thread da interface: o membro de um
+    pacote ainda não aberto conta como existente se o pacote existir (só a
+    leitura no pool vai dizer), como uma URL."""
+    if remoto.eh_url(caminho):
+        return True
+    arquivo, membro = dividir(caminho)
+    if membro is None:
+        return os.path.exists(caminho)
+    pronto = aberto(arquivo)
+    return os.path.exists(arquivo) if pronto is None else membro in pronto.membros
+
+
+def assinatura(caminho):
+    """(caminho real, tamanho, mtime em ns) que identifica o conteúdo de um
+    arquivo, membro de pacote ou URL já baixada, para chaves de cache; None
+    se não existir (ou ainda não tiver sido baixada)."""
+    if remoto.eh_url(caminho):
+        local = remoto.cache_http.local(caminho)
+        try:
+            st = os.stat(local) if local else None
+        except OSError:
+            st = None
+        return (caminho, st.st_size, st.st_mtime_ns) if st else None
+    arquivo, membro = dividir(caminho)
+    try:
+        st = os.stat(arquivo)
+        real = os.path.normcase(os.path.realpath(arquivo))
+        if membro is None:
+            return real, st.st_size, st.st_mtime_ns
+        return juntar(real, membro), pacote(arquivo).tamanho(membro), st.st_mtime_ns
+    except (OSError, KeyError):
+        return None
@@ -4,7 +4,6 @@ Interface visual limpa e organizada para gerenciar todas as janelas do sistema
 Com animações neon RGB suaves
 """
 
-import os
 from PIL import Image
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QScrollArea, QWidget, QPushButton,
@@ -12,6 +11,9 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtGui import QPixmap, QIcon, QColor, QFont, QLinearGradient, QPainter, QPen, QBrush
 from PySide6.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QEasingCurve, QRect, Property
+import pacotes
+import remoto
+from renderizacao import abrir_imagem, pil_para_qpixmap
 
 
 def criar_icone_editar_melhorado():
@@ -247,25 +249,29 @@ class CartaJanela(QFrame):
             }}
         """)
     
+    @staticmethod
+    def _local(caminho):
+        """Caminho legível sem ir à rede: uma URL só vale se já foi baixada."""
+        if caminho and remoto.eh_url(caminho):
+            return remoto.cache_http.local(caminho)
+        return caminho if caminho and pacotes.existe(caminho) else None
+
     def _carregar_preview(self):
         """Carrega prévia da imagem template ou imagem"""
         try:
             # Tentar carregar template primeiro
-            caminho = self.cfg.get("caminho_template")
-            if not caminho or not os.path.exists(caminho):
+            caminho = self._local(self.cfg.get("caminho_template"))
+            if not caminho:
                 # Se template não existe, tentar imagem
-                caminho = self.cfg.get("caminho_imagem")
+                caminho = self._local(self.cfg.get("caminho_imagem"))
             
-            if caminho and os.path.exists(caminho):
-                img = Image.open(caminho).convert("RGBA")
+            if caminho:
+                img = abrir_imagem(caminho, (120, 120))
                 # Redimensionar para caber no preview (máximo 120x120)
                 img.thumbnail((120, 120), Image.LANCZOS)
                 
                 # Converter para QPixmap
-                data = img.tobytes("raw", "RGBA")
-                from PySide6.QtGui import QImage
-                qimg = QImage(data, img.width, img.height, QImage.Format_RGBA8888)
-                pixmap = QPixmap.fromImage(qimg)
+                pixmap = pil_para_qpixmap(img)
                 
                 self.img_preview.setPixmap(pixmap)
             else:
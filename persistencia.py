@@ -0,0 +1,111 @@
+"""
+Persistência do config.json do Vaporwave Windows
+Mover ou redimensionar uma janela só a marca como alterada; as mudanças
+são juntadas por ESPERA_MS e gravadas numa thread do pool, de forma atômica,
+em vez de reescrever o arquivo inteiro na thread da interface a cada evento
+"""
+
+import json
+import logging
+import os
+import threading
+from functools import partial
+
+from PySide6.QtCore import QObject, QTimer
+
+from tarefas import Renderizador
+
+logger = logging.getLogger(__name__)
+
+ESPERA_MS = 500  # a primeira mudança agenda a gravação; as seguintes entram na mesma
+
+
+def gravar_atomico(caminho, texto):
+    """Grava num temporário na mesma pasta e troca pelo rename: quem lê (ou
+    um crash no meio) vê o arquivo antigo inteiro ou o novo inteiro."""
+    temporario = f"{caminho}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        # disco cheio, sem permissão no destino...: não deixa o temporário para trás
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+
+class GravadorConfig(QObject):
+    """Gravação adiada do config.
+
+    marcar(nome) registra a janela alterada e, se não houver gravação
+    agendada, agenda uma para daqui a ESPERA_MS; durante um arraste isso dá
+    no máximo uma gravação a cada ESPERA_MS. Na hora de gravar, coletar(nomes)
+    copia o estado das janelas marcadas para o cfg, que é serializado na
+    thread da interface (onde ele muda) e escrito no pool. Cada serialização
+    leva um número de versão e uma gravação mais velha que a última feita é
+    descartada, então a ordem no disco é sempre a ordem das mudanças.
+    descarregar() grava o pendente na hora, esperando a que estiver em curso.
+    """
+
+    def __init__(self, caminho, cfg, coletar, parent=None):
+        super().__init__(parent)
+        self.caminho = caminho
+        self.cfg = cfg
+        self._coletar = coletar
+        self._sujas = set()      # nomes das janelas alteradas desde a última serialização
+        self._pendente = False
+        self._versao = 0         # última serializada
+        self._gravada = 0        # última escrita no disco
+        self._ultima = None      # (versão, texto) da última serialização
+        self._lock = threading.Lock()
+        self.gravacoes = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(ESPERA_MS)
+        self._timer.timeout.connect(self._gravar_no_pool)
+        self._renderizador = Renderizador(self)
+
+    def marcar(self, nome=None):
+        """Agenda a gravação; com nome, o estado dessa janela é relido antes."""
+        if nome is not None:
+            self._sujas.add(nome)
+        self._pendente = True
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _serializar(self):
+        self._coletar(self._sujas)
+        self._sujas.clear()
+        self._pendente = False
+        self._versao += 1
+        self._ultima = (self._versao, json.dumps(self.cfg, indent=4, ensure_ascii=False))
+        return self._ultima
+
+    def _gravar_no_pool(self):
+        versao, texto = self._serializar()
+        self._renderizador.pedir("config", partial(self._gravar, versao, texto), lambda _: None)
+
+    def _gravar(self, versao, texto):
+        with self._lock:
+            if versao <= self._gravada:
+                return
+            gravar_atomico(self.caminho, texto)
+            self._gravada = versao
+            self.gravacoes += 1
+
+    def descarregar(self):
+        """Grava agora, na thread atual, tudo o que ainda não está no disco."""
+        self._timer.stop()
+        if self._pendente:
+            self._serializar()
+        if self._ultima is None:
+            return
+        try:
+            self._gravar(*self._ultima)
+        except OSError as e:
+            logger.error(f"Falha ao gravar {self.caminho}: {e}")
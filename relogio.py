@@ -0,0 +1,245 @@
+"""
+Relógio de animação do Vaporwave Windows
+Um único timer para o app inteiro: quadros de GIF, trocas do slideshow e
+transições de todas as janelas são atendidos no mesmo despertar, alinhado à
+taxa de atualização da tela, em vez de cada janela acordar a thread da
+interface por conta própria
+"""
+
+import logging
+import math
+
+from PySide6.QtCore import QElapsedTimer, QEasingCurve, QObject, QRect, Qt, QTimer, Signal
+from PySide6.QtGui import QGuiApplication
+
+logger = logging.getLogger(__name__)
+
+TAXA_PADRAO_HZ = 60.0
+
+
+class RelogioAnimacao(QObject):
+    """Despertares de todas as janelas num só QTimer.
+
+    Há dois tipos de inscrição: prazos (Prazo), que disparam uma vez num
+    instante, e animações contínuas (Transicao), chamadas a cada quadro da
+    tela enquanto estiverem rodando. O timer é reprogramado para o quadro da
+    tela mais próximo do prazo mais cedo, e tudo o que vencer até meio quadro
+    depois dele roda no mesmo despertar; sem inscrições ele fica parado.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tempo = QElapsedTimer()
+        self._tempo.start()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._prazos = {}      # Prazo -> instante em ms
+        self._continuas = []   # Transicao rodando, na ordem em que começaram
+        self._alvo = None      # instante para o qual o timer está programado
+        self.despertares = 0
+        self.fps_maximo = None  # teto do orçamento de quadros, abaixo da taxa da tela
+        self.periodo_ms = 1000.0 / TAXA_PADRAO_HZ
+        app = QGuiApplication.instance()
+        if app is not None:
+            app.primaryScreenChanged.connect(lambda _: self.atualizar_periodo())
+        self.atualizar_periodo()
+
+    def atualizar_periodo(self):
+        """Período de um quadro da tela principal, ou do teto de quadros por
+        segundo se ele for menor."""
+        tela = QGuiApplication.primaryScreen()
+        taxa = tela.refreshRate() if tela is not None else 0
+        taxa = taxa if taxa and taxa > 1 else TAXA_PADRAO_HZ
+        if self.fps_maximo:
+            taxa = min(taxa, self.fps_maximo)
+        self.periodo_ms = 1000.0 / taxa
+
+    def definir_fps_maximo(self, fps):
+        self.fps_maximo = fps
+        self.atualizar_periodo()
+
+    def agora(self):
+        return self._tempo.nsecsElapsed() / 1_000_000
+
+    def agendar(self, prazo, instante):
+        self._prazos[prazo] = instante
+        self._reprogramar()
+
+    def cancelar(self, prazo):
+        if self._prazos.pop(prazo, None) is not None:
+            self._reprogramar()
+
+    def instante(self, prazo):
+        return self._prazos.get(prazo)
+
+    def iniciar_continua(self, animacao):
+        if animacao not in self._continuas:
+            self._continuas.append(animacao)
+        self._reprogramar()
+
+    def parar_continua(self, animacao):
+        if animacao in self._continuas:
+            self._continuas.remove(animacao)
+
+    def _quadro_da_tela(self, instante):
+        """Despertar da tela mais próximo do instante."""
+        return round(instante / self.periodo_ms) * self.periodo_ms
+
+    def _reprogramar(self):
+        agora = self.agora()
+        if self._continuas:
+            alvo = math.ceil(agora / self.periodo_ms) * self.periodo_ms
+        elif self._prazos:
+            alvo = self._quadro_da_tela(min(self._prazos.values()))
+        else:
+            self._timer.stop()
+            self._alvo = None
+            return
+        if self._timer.isActive() and self._alvo is not None and self._alvo <= alvo:
+            return
+        self._alvo = alvo
+        self._timer.start(max(0, round(alvo - agora)))
+
+    def _tick(self):
+        self._alvo = None
+        self.despertares += 1
+        agora = self.agora()
+        limite = agora + self.periodo_ms / 2
+        vencidos = sorted((instante, i, prazo) for i, (prazo, instante) in enumerate(self._prazos.items())
+                          if instante <= limite)
+        for _, _, prazo in vencidos:
+            del self._prazos[prazo]
+        for instante, _, prazo in vencidos:
+            self._executar(prazo.disparar, instante, agora)
+        for animacao in list(self._continuas):
+            if not self._executar(animacao.passo, agora):
+                self.parar_continua(animacao)
+        self._reprogramar()
+
+    @staticmethod
+    def _executar(funcao, *args):
+        """Um erro numa janela (fechada no meio do caminho, por exemplo) não
+        derruba as outras do mesmo despertar; a inscrição é descartada."""
+        try:
+            return funcao(*args)
+        except Exception as e:
+            logger.warning(f"Relógio de animação: {e}")
+            return False
+
+
+class Prazo:
+    """Um despertar no relógio com a interface do QTimer que as janelas usavam
+    (start, stop, isActive, remainingTime).
+
+    start() chamado de dentro do próprio callback mede o intervalo a partir
+    do instante agendado, não do despertar: o arredondamento para o quadro da
+    tela não se acumula e um GIF de 100 ms continua tocando a 10 quadros/s.
+    Se a janela ficou mais de um intervalo para trás, recomeça de agora.
+    """
+
+    def __init__(self, relogio, callback, repetir=False):
+        self.relogio = relogio
+        self.callback = callback
+        self.repetir = repetir
+        self.intervalo = 0
+        self._disparado_em = None  # instante agendado, enquanto o callback roda
+
+    def start(self, ms=None):
+        if ms is not None:
+            self.intervalo = ms
+        agora = self.relogio.agora()
+        base = self._disparado_em
+        if base is None or base + self.intervalo < agora:
+            base = agora
+        self.relogio.agendar(self, base + self.intervalo)
+
+    def stop(self):
+        self.relogio.cancelar(self)
+
+    def disparar_em(self, instante):
+        """Agenda o disparo para um instante de relogio.agora()."""
+        self.relogio.agendar(self, instante)
+
+    def adiar(self, ms):
+        """Agenda o próximo disparo para daqui a ms sem mudar o intervalo
+        dos seguintes (retomada de um slideshow no meio do intervalo)."""
+        self.relogio.agendar(self, self.relogio.agora() + ms)
+
+    def isActive(self):
+        return self.relogio.instante(self) is not None
+
+    def remainingTime(self):
+        instante = self.relogio.instante(self)
+        return -1 if instante is None else max(0, round(instante - self.relogio.agora()))
+
+    def disparar(self, instante, agora):
+        self._disparado_em = instante
+        try:
+            if self.repetir:
+                self.start()
+            self.callback()
+        finally:
+            self._disparado_em = None
+
+
+class Transicao(QObject):
+    """Anima uma propriedade (float ou QRect) pelo relógio, com a interface
+    do QPropertyAnimation que animacoes usava: cada quadro da tela calcula o
+    valor pelo tempo decorrido, então todas as transições abertas andam no
+    mesmo despertar que os quadros de GIF."""
+
+    finished = Signal()
+
+    def __init__(self, relogio, alvo, propriedade, parent=None):
+        super().__init__(parent)
+        self.relogio = relogio
+        self.alvo = alvo
+        self.propriedade = propriedade.decode() if isinstance(propriedade, bytes) else propriedade
+        self.duracao = 250
+        self.inicial = None
+        self.final = None
+        self.curva = QEasingCurve(QEasingCurve.Linear)
+        self._inicio = None
+
+    def setDuration(self, ms):
+        self.duracao = ms
+
+    def setStartValue(self, valor):
+        self.inicial = valor
+
+    def setEndValue(self, valor):
+        self.final = valor
+
+    def setEasingCurve(self, curva):
+        self.curva = QEasingCurve(curva)
+
+    def start(self):
+        self._inicio = self.relogio.agora()
+        self._aplicar(0.0)
+        self.relogio.iniciar_continua(self)
+
+    def stop(self):
+        self.relogio.parar_continua(self)
+
+    def passo(self, agora):
+        """Chamado pelo relógio; False quando a transição terminou."""
+        progresso = min(1.0, (agora - self._inicio) / self.duracao) if self.duracao > 0 else 1.0
+        self._aplicar(progresso)
+        if progresso < 1.0:
+            return True
+        self.finished.emit()
+        self.deleteLater()
+        return False
+
+    def _aplicar(self, progresso):
+        t = self.curva.valueForProgress(progresso)
+        if isinstance(self.inicial, QRect):
+            a, b = self.inicial, self.final
+            valor = QRect(round(a.x() + (b.x() - a.x()) * t), round(a.y() + (b.y() - a.y()) * t),
+                          round(a.width() + (b.width() - a.width()) * t),
+                          round(a.height() + (b.height() - a.height()) * t))
+        else:
+            valor = self.inicial + (self.final - self.inicial) * t
+        self.alvo.setProperty(self.propriedade, valor)
@@ -0,0 +1,254 @@
+"""
+Fontes HTTP do Vaporwave Windows
+Imagens servidas por um host de mídia: um manifesto lista as URLs, as
+conexões keep-alive são reaproveitadas entre pedidos e cada arquivo baixado
+fica num cache em disco, revalidado com ETag/If-Modified-Since. Tudo aqui
+bloqueia na rede e deve rodar no pool, nunca na thread da interface
+"""
+
+import hashlib
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+logger = logging.getLogger(__name__)
+
+PASTA_CACHE = os.path.join("cache", "http")
+LIMITE_CACHE = 512 * 1024 * 1024  # bytes de arquivos baixados guardados em PASTA_CACHE
+VALIDADE_S = 300          # tempo sem revalidar um arquivo já baixado
+TIMEOUT_S = 10
+CONEXOES_POR_HOST = 4
+
+
+def eh_url(caminho):
+    return bool(caminho) and caminho.lower().startswith(("http://", "https://"))
+
+
+def extensao_url(url):
+    """Extensão do caminho da URL, sem a query ("" se não houver)."""
+    return os.path.splitext(urlsplit(url).path)[1].lower()
+
+
+class PoolConexoes:
+    """Conexões HTTP/1.1 keep-alive por host, reaproveitadas entre threads.
+
+    Cada pedido pega uma conexão livre do host (ou abre outra) e a devolve
+    depois de ler a resposta inteira; no máximo CONEXOES_POR_HOST ficam
+    guardadas. Uma conexão guardada que o servidor fechou é refeita uma vez.
+    """
+
+    def __init__(self, por_host=CONEXOES_POR_HOST, timeout=TIMEOUT_S):
+        self.por_host = por_host
+        self.timeout = timeout
+        self.abertas = 0       # conexões criadas, para acompanhar o reaproveitamento
+        self._livres = {}      # (esquema, host, porta) -> [conexões]
+        self._lock = threading.Lock()
+
+    def _obter(self, chave):
+        with self._lock:
+            livres = self._livres.get(chave)
+            if livres:
+                return livres.pop(), True
+            self.abertas += 1
+        esquema, host, porta = chave
+        classe = http.client.HTTPSConnection if esquema == "https" else http.client.HTTPConnection
+        return classe(host, porta, timeout=self.timeout), False
+
+    def _devolver(self, chave, conexao):
+        with self._lock:
+            livres = self._livres.setdefault(chave, [])
+            if len(livres) < self.por_host:
+                livres.append(conexao)
+                return
+        conexao.close()
+
+    def pedir(self, url, cabecalhos=None):
+        """GET da URL; retorna (status, cabeçalhos, corpo)."""
+        partes = urlsplit(url)
+        chave = (partes.scheme.lower(), partes.hostname, partes.port)
+        alvo = (partes.path or "/") + (f"?{partes.query}" if partes.query else "")
+        while True:
+            conexao, reaproveitada = self._obter(chave)
+            try:
+                conexao.request("GET", alvo, headers=cabecalhos or {})
+                resposta = conexao.getresponse()
+                corpo = resposta.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conexao.close()
+                if reaproveitada:
+                    continue  # o servidor fechou a conexão ociosa: tenta numa nova
+                raise
+            except Exception:
+                conexao.close()
+                raise
+            if resposta.will_close:
+                conexao.close()
+            else:
+                self._devolver(chave, conexao)
+            return resposta.status, resposta.headers, corpo
+
+
+class CacheHttp:
+    """Arquivos baixados por URL, guardados em pasta com o ETag e o
+    Last-Modified da resposta.
+
+    baixar() devolve o caminho local do arquivo. Um arquivo baixado há menos
+    de validade_s segundos é usado sem ir à rede; depois disso o pedido é
+    condicional e um 304 só renova a validade. Sem rede, o arquivo que já
+    estiver em cache continua servindo. O nome local mantém a extensão da
+    URL, para que quem decide pelo nome (eh_animada) enxergue o mesmo tipo.
+    Como no CacheDisco, o total passa por LRU (data de último uso do
+    arquivo) até caber em limite_bytes.
+    """
+
+    def __init__(self, pasta, pool=None, validade_s=VALIDADE_S, limite_bytes=LIMITE_CACHE):
+        self.pasta = pasta
+        self.pool = pool or PoolConexoes()
+        self.validade_s = validade_s
+        self.limite_bytes = limite_bytes
+        self._validados = {}  # url -> time.monotonic() da última validação
+        self._locks = {}      # url -> lock do download em curso
+        self._lock = threading.Lock()
+        self._entradas = None  # nome do arquivo baixado -> [bytes, último uso]; lido na 1ª vez
+        self.bytes_usados = 0
+
+    def _arquivos(self, url):
+        nome = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.pasta, nome)
+        return base + extensao_url(url), base + ".meta"
+
+    def local(self, url):
+        """Caminho local se a URL já foi baixada; nunca acessa a rede."""
+        corpo, _ = self._arquivos(url)
+        return corpo if os.path.exists(corpo) else None
+
+    def baixar(self, url, validade_s=None):
+        validade_s = self.validade_s if validade_s is None else validade_s
+        with self._lock:
+            trava = self._locks.setdefault(url, threading.Lock())
+        try:
+            with trava:  # pedidos simultâneos da mesma URL esperam o primeiro
+                corpo = self._baixar(url, validade_s)
+                self._usar(corpo)
+                return corpo
+        finally:
+            with self._lock:
+                self._locks.pop(url, None)
+
+    def _baixar(self, url, validade_s):
+        corpo, meta = self._arquivos(url)
+        em_cache = os.path.exists(corpo)
+        validado = self._validados.get(url)
+        if em_cache and validado is not None and time.monotonic() - validado < validade_s:
+            return corpo
+        cabecalhos = {}
+        if em_cache:
+            try:
+                with open(meta, encoding="utf-8") as f:
+                    info = json.load(f)
+            except (OSError, ValueError):
+                info = {}
+            if info.get("etag"):
+                cabecalhos["If-None-Match"] = info["etag"]
+            if info.get("last_modified"):
+                cabecalhos["If-Modified-Since"] = info["last_modified"]
+        try:
+            status, resposta, dados = self.pool.pedir(url, cabecalhos)
+        except (OSError, http.client.HTTPException) as e:
+            if em_cache:
+                logger.warning(f"Sem acesso a {url} ({e}); usando a cópia em cache")
+                return corpo
+            raise OSError(f"Falha ao baixar {url}: {e}") from e
+        if status == 304 and em_cache:
+            self._validados[url] = time.monotonic()
+            return corpo
+        if status != 200:
+            if em_cache:
+                logger.warning(f"HTTP {status} em {url}; usando a cópia em cache")
+                return corpo
+            raise OSError(f"HTTP {status} em {url}")
+        os.makedirs(self.pasta, exist_ok=True)
+        self._gravar(corpo, dados)
+        info = {"etag": resposta.get("ETag"), "last_modified": resposta.get("Last-Modified")}
+        self._gravar(meta, json.dumps(info).encode("utf-8"))
+        self._validados[url] = time.monotonic()
+        return corpo
+
+    def _carregar_indice(self):
+        if self._entradas is not None:
+            return
+        self._entradas = {}
+        try:
+            with os.scandir(self.pasta) as it:
+                for e in it:
+                    if not e.name.endswith((".meta", ".tmp")) and e.is_file():
+                        st = e.stat()
+                        self._entradas[e.name] = [st.st_size, st.st_mtime]
+        except OSError:
+            pass
+        self.bytes_usados = sum(t for t, _ in self._entradas.values())
+
+    def _usar(self, corpo):
+        """Marca o arquivo como usado agora (também no disco, para o LRU das
+        próximas execuções) e remove os mais antigos se passar do limite."""
+        try:
+            os.utime(corpo)
+            tamanho = os.path.getsize(corpo)
+        except OSError:
+            return
+        nome = os.path.basename(corpo)
+        with self._lock:
+            self._carregar_indice()
+            anterior = self._entradas.get(nome)
+            self.bytes_usados += tamanho - (anterior[0] if anterior else 0)
+            self._entradas[nome] = [tamanho, time.time()]
+            self._evictar(nome)
+
+    def _evictar(self, manter):
+        """Remove os arquivos usados há mais tempo até caber no limite, menos
+        o que acabou de ser pedido (com o lock)."""
+        if self.bytes_usados <= self.limite_bytes:
+            return
+        for nome, _ in sorted(self._entradas.items(), key=lambda e: e[1][1]):
+            if self.bytes_usados <= self.limite_bytes:
+                break
+            if nome == manter:
+                continue
+            tamanho, _ = self._entradas.pop(nome)
+            self.bytes_usados -= tamanho
+            base = os.path.join(self.pasta, nome)
+            for arquivo in (base, os.path.splitext(base)[0] + ".meta"):
+                try:
+                    os.remove(arquivo)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _gravar(caminho, dados):
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+
+
+cache_http = CacheHttp(PASTA_CACHE)
+
+
+def ler_manifesto(url):
+    """URLs absolutas listadas no manifesto: um JSON com uma lista (ou um
+    objeto com a lista em "imagens") ou texto com uma URL por linha. URLs
+    relativas são resolvidas a partir do manifesto, que é sempre revalidado."""
+    with open(cache_http.baixar(url, validade_s=0), "rb") as f:
+        texto = f.read().decode("utf-8-sig")
+    try:
+        itens = json.loads(texto)
+        if isinstance(itens, dict):
+            itens = itens.get("imagens", [])
+    except ValueError:
+        itens = [linha.strip() for linha in texto.splitlines()]
+        itens = [i for i in itens if i and not i.startswith("#")]
+    return [urljoin(url, i) for i in itens if isinstance(i, str)]
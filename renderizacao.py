@@ -0,0 +1,206 @@
+"""
+Pipeline de pixels do Vaporwave Windows
+Mantém os buffers em ARGB32 premultiplicado, o formato nativo do raster do Qt,
+compartilha memória entre arrays NumPy, imagens PIL e QImages sem cópias extras
+e compõe o overlay do chroma direto no paintEvent
+"""
+
+import time
+
+import numpy as np
+from PIL import Image
+from PySide6.QtCore import Qt, QPoint, Property
+from PySide6.QtGui import QImage, QPixmap, QPainter, QColor
+from PySide6.QtWidgets import QWidget
+
+import pacotes
+
+# ARGB32 premultiplicado: em memória (little-endian) os bytes ficam B, G, R, A
+FORMATO = QImage.Format_ARGB32_Premultiplied
+
+
+def filtro_pil(rapido):
+    """Filtro barato durante interação, animação e transições; LANCZOS no refino."""
+    return Image.NEAREST if rapido else Image.LANCZOS
+
+
+def transformacao_qt(rapido):
+    return Qt.FastTransformation if rapido else Qt.SmoothTransformation
+
+
+def pil_para_qimage(img):
+    """Converte uma imagem PIL RGBA em QImage premultiplicada.
+
+    A única cópia é o tobytes: o empacotador "BGRa" do PIL premultiplica e
+    reordena os canais no mesmo passo, e a QImage apenas referencia o buffer.
+    """
+    dados = img.tobytes("raw", "BGRa")
+    return QImage(dados, img.width, img.height, img.width * 4, FORMATO)
+
+
+def pil_para_qpixmap(img):
+    return QPixmap.fromImage(pil_para_qimage(img))
+
+
+def escalar_em(destino, origem, suave):
+    """Desenha origem escalada para ocupar todo o destino, reaproveitando os
+    pixels do destino em vez de alocar uma QImage nova como QImage.scaled."""
+    painter = QPainter(destino)
+    painter.setCompositionMode(QPainter.CompositionMode_Source)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform, suave)
+    painter.drawImage(destino.rect(), origem)
+    painter.end()
+    return destino
+
+
+def tamanho_escalado(w, h, cw, ch, manter_proporcao):
+    """Tamanho de uma fonte w x h dentro de uma área cw x ch."""
+    if manter_proporcao:
+        # como o thumbnail: só reduz, preservando a proporção
+        fator = min(cw / w, ch / h, 1.0)
+        return max(1, round(w * fator)), max(1, round(h * fator))
+    return cw, ch
+
+
+def escalar_imagem(src, cw, ch, manter_proporcao, rapido):
+    """Fonte escalada para a área cw x ch, já em ARGB32 premultiplicado.
+    Aceita QImage ou imagem PIL.
+    Não toca em widgets, então pode rodar fora da thread da interface."""
+    if isinstance(src, QImage):
+        w, h = tamanho_escalado(src.width(), src.height(), cw, ch, manter_proporcao)
+        return src.scaled(w, h, Qt.IgnoreAspectRatio, transformacao_qt(rapido))
+    w, h = tamanho_escalado(src.width, src.height, cw, ch, manter_proporcao)
+    return pil_para_qimage(src.resize((w, h), filtro_pil(rapido)))
+
+
+def abrir_imagem(caminho, tamanho=None):
+    """Abre uma imagem em RGBA. Com o tamanho alvo, JPEGs são decodificados já
+    reduzidos pelo DCT (draft: 1/2, 1/4 ou 1/8), nunca abaixo do alvo; uma foto
+    de 24 MP para um slot de 400 px decodifica em 1/8 do tempo e da memória.
+    O tamanho original fica em info["tamanho_original"]. O caminho pode
+    apontar para um membro de pacote zip/tar (ver pacotes)."""
+    img = Image.open(pacotes.abrir(caminho))
+    original = img.size
+    if tamanho:
+        img.draft(None, tamanho)  # só tem efeito em JPEG
+    img = img.convert("RGBA")
+    img.info["tamanho_original"] = original
+    return img
+
+
+def cobre(img, cw, ch):
+    """A imagem decodificada tem pixels suficientes para a área cw x ch:
+    é a original ou foi reduzida para um tamanho ainda maior que a área."""
+    ow, oh = img.info.get("tamanho_original", img.size)
+    return img.width >= min(cw, ow) and img.height >= min(ch, oh)
+
+
+def preparar_fonte(origem, cw, ch, manter_proporcao, rapido, disco=None, imagens=None):
+    """Decodifica (se origem for um caminho, já reduzida para a área) e escala
+    uma fonte estática. Retorna (fonte, QImage escalada), onde fonte é a
+    imagem PIL RGBA. Um caminho já escalado antes para essa área vem pronto
+    do cache compartilhado (imagens, CacheImagens) ou do disco (disco,
+    CacheDisco) sem decodificar, e a fonte devolvida é o próprio caminho;
+    escalas refinadas de um caminho são gravadas no disco."""
+    if not isinstance(origem, str):
+        return origem, escalar_imagem(origem, cw, ch, manter_proporcao, rapido)
+    if imagens is not None:
+        escalada = imagens.escalada(origem, cw, ch, manter_proporcao, rapido)
+        if escalada is not None:
+            return origem, escalada
+    if disco is not None:
+        quadros = disco.ler(origem, cw, ch, manter_proporcao)
+        if quadros:
+            if imagens is not None:
+                imagens.guardar_escalada(origem, cw, ch, manter_proporcao, False, quadros[0][0])
+            return origem, quadros[0][0]
+    if imagens is not None:
+        img = imagens.decodificada(origem, (cw, ch))
+    else:
+        img = abrir_imagem(origem, (cw, ch))
+    escalada = escalar_imagem(img, cw, ch, manter_proporcao, rapido)
+    if imagens is not None:
+        imagens.guardar_escalada(origem, cw, ch, manter_proporcao, rapido, escalada)
+    if disco is not None and not rapido:
+        disco.gravar(origem, cw, ch, manter_proporcao, [(escalada, 0)])
+    return img, escalada
+
+
+def mascara_para_qimage(mascara):
+    """QImage Alpha8 com alfa 255 onde a máscara booleana é verdadeira."""
+    h, w = mascara.shape
+    alfa = np.ascontiguousarray(mascara, dtype=np.uint8) * 255
+    return QImage(alfa.data, w, h, w, QImage.Format_Alpha8).copy()
+
+
+class OverlayChroma(QWidget):
+    """Camada das imagens dentro do chroma, desenhada com QPainter.
+
+    As fontes já escaladas (uma por slot verde do template) são pintadas
+    sobre fundo preto num único passo, recortadas pela máscara
+    do verde com CompositionMode_DestinationIn e a opacidade entra no mesmo
+    paint; não há canvas PIL, conversão para pixmap nem QGraphicsOpacityEffect
+    por quadro. O conteúdo fica preso à área do chroma (origem), então animar
+    a geometria do widget revela ou esconde a imagem sem deslocá-la.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TranslucentBackground, True)
+        self._fontes = {}  # slot -> (QPixmap, posição relativa à origem)
+        self._mascara = None
+        self._origem = QPoint()
+        self._opacidade = 1.0
+        self.custo_pintura_ms = 0.0  # média móvel do tempo de paintEvent, para o orçamento de quadros
+
+    def definir_mascara(self, origem, mascara):
+        """Área do chroma (canto superior esquerdo, na janela) e sua máscara:
+        booleana ou já em QImage Alpha8 (ver mascara_para_qimage)."""
+        self._origem = QPoint(origem)
+        self._mascara = mascara if isinstance(mascara, QImage) else mascara_para_qimage(mascara)
+        self.update()
+
+    def definir_fonte(self, pixmap, posicao, slot=0):
+        """Fonte escalada do slot e sua posição dentro da área do chroma.
+        Aceita QPixmap ou QImage (o buffer reutilizável da janela)."""
+        self._fontes[slot] = (pixmap, QPoint(posicao))
+        self.update()
+
+    def fonte(self, slot=0):
+        item = self._fontes.get(slot)
+        return item[0] if item else None
+
+    def limpar(self, slot=0):
+        self._fontes.pop(slot, None)
+        self.update()
+
+    def _get_opacidade(self):
+        return self._opacidade
+
+    def _set_opacidade(self, valor):
+        self._opacidade = valor
+        self.update()
+
+    opacidade = Property(float, _get_opacidade, _set_opacidade)
+
+    def paintEvent(self, _):
+        if not self._fontes or self._mascara is None or self._opacidade <= 0:
+            return
+        inicio = time.perf_counter()
+        painter = QPainter(self)
+        painter.translate(self._origem - self.pos())
+        painter.fillRect(self._mascara.rect(), Qt.black)
+        for fonte, posicao in self._fontes.values():
+            if isinstance(fonte, QImage):
+                painter.drawImage(posicao, fonte)
+            else:
+                painter.drawPixmap(posicao, fonte)
+        # recorta pelo verde e, em transições, multiplica o alfa pela opacidade
+        # (setOpacity com DestinationIn interpola em vez de multiplicar)
+        painter.setCompositionMode(QPainter.CompositionMode_DestinationIn)
+        painter.drawImage(0, 0, self._mascara)
+        if self._opacidade < 1.0:
+            painter.fillRect(self._mascara.rect(), QColor(0, 0, 0, round(self._opacidade * 255)))
+        painter.end()
+        custo = (time.perf_counter() - inicio) * 1000
+        self.custo_pintura_ms += (custo - self.custo_pintura_ms) * 0.2
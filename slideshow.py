@@ -0,0 +1,353 @@
+"""
+Ordem de reprodução, índice da pasta e fase das trocas do slideshow do
+Vaporwave Windows
+Planeja a sequência com antecedência para que a próxima imagem seja
+conhecida (e pré-carregada) antes da troca, inclusive entre embaralhamentos,
+e acompanha a pasta de imagens sem reconstruir a janela. Pastas com centenas
+de milhares de imagens cabem num índice compacto, sem uma string de caminho
+por arquivo, e a ordem aleatória é uma permutação calculada sob demanda
+"""
+
+import math
+import os
+import random
+import sys
+from array import array
+from functools import partial
+
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+import pacotes
+import remoto
+from tarefas import Renderizador
+
+EXTENSOES = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp")
+
+
+def listar_imagens(pasta):
+    """Nomes das imagens da pasta, lidos em fluxo pelo os.scandir; vazio se
+    ela não existir mais. Num pacote zip/tar, os membros que são imagens;
+    num manifesto HTTP, as URLs de imagens (bloqueia na rede: só no pool)."""
+    if remoto.eh_url(pasta):
+        return [u for u in remoto.ler_manifesto(pasta) if remoto.extensao_url(u).endswith(EXTENSOES)]
+    if pacotes.eh_pacote(pasta):
+        return [n for n in pacotes.listar(pasta) if n.lower().endswith(EXTENSOES)]
+    try:
+        with os.scandir(pasta) as it:
+            return [e.name for e in it if e.name.lower().endswith(EXTENSOES)]
+    except OSError:
+        return []
+
+
+class IndicePasta(QObject):
+    """Imagens de uma pasta num índice compacto, mantido em dia pelo
+    QFileSystemWatcher.
+
+    A pasta é guardada uma vez; os nomes ficam concatenados em UTF-8 num
+    bytearray, com o início de cada um num array de inteiros, e a ordem
+    alfabética é outro array de ids. Um id (posição de inserção) nunca muda:
+    arquivos removidos só são marcados como inativos e, se voltarem, reusam o
+    id antigo. caminho(id) monta o caminho completo quando é pedido. A pasta
+    pode ser um pacote zip/tar: os ids são os membros e o watcher observa o
+    próprio arquivo. Pode ainda ser a URL de um manifesto HTTP: os ids são
+    as URLs e o manifesto é relido a cada RELEITURA_MANIFESTO_MS.
+
+    O índice começa vazio e a primeira leitura, como todas as outras, roda no
+    pool: as imagens chegam pelo sinal mudou, sem listar uma pasta de
+    centenas de milhares de arquivos (ou indexar um pacote) na thread da
+    interface.
+
+    O watcher só avisa que o diretório mudou. A pasta é relida depois de
+    ESPERA_MS sem novos avisos (uma cópia de vários arquivos dispara dezenas
+    deles) e só a diferença é emitida em mudou(ids adicionados, ids removidos).
+    A releitura e a diferença rodam no pool sobre uma cópia do índice (ver
+    diferenca_pasta); a thread da interface só aplica o resultado.
+    """
+
+    mudou = Signal(list, list)
+    ESPERA_MS = 300
+    RELEITURA_MANIFESTO_MS = 60 * 1000
+
+    def __init__(self, pasta, parent=None):
+        super().__init__(parent)
+        self.pasta = sys.intern(pasta)
+        self._remoto = remoto.eh_url(pasta)
+        self._dados = bytearray()
+        # nome do id i: _dados[_inicios[i]:_inicios[i + 1]]
+        self._inicios = array("Q", [0])
+        self._ativos = bytearray()   # 1 se o arquivo do id existe
+        self.ordem = array("I")      # ids em ordem alfabética
+        self.ativos = 0
+        self._espera = QTimer(self)
+        self._espera.setSingleShot(True)
+        self._espera.setInterval(self.ESPERA_MS)
+        self._espera.timeout.connect(self._reler)
+        self._renderizador = Renderizador(self)
+        if self._remoto:
+            self._espera.setInterval(self.RELEITURA_MANIFESTO_MS)
+            self._espera.setSingleShot(False)
+            self._espera.start()
+        else:
+            self._pacote = pacotes.eh_pacote(pasta)
+            self._watcher = QFileSystemWatcher([pasta], self)
+            self._watcher.directoryChanged.connect(lambda _: self._espera.start())
+            self._watcher.fileChanged.connect(lambda _: self._espera.start())
+        self._reler()
+
+    def __len__(self):
+        """Número de ids, incluindo os inativos."""
+        return len(self._ativos)
+
+    def _acrescentar(self, nome):
+        self._dados += nome.encode("utf-8", "surrogateescape")
+        self._inicios.append(len(self._dados))
+        self._ativos.append(1)
+        self.ativos += 1
+        return len(self._ativos) - 1
+
+    def nome(self, i):
+        return self._dados[self._inicios[i]:self._inicios[i + 1]].decode("utf-8", "surrogateescape")
+
+    def caminho(self, i):
+        if self._remoto:
+            return self.nome(i)
+        if self._pacote:
+            return pacotes.juntar(self.pasta, self.nome(i))
+        return os.path.join(self.pasta, self.nome(i))
+
+    def ativo(self, i):
+        return i < len(self._ativos) and self._ativos[i] == 1
+
+    def posicao_alfabetica(self, i):
+        """Posição do id em ordem (busca binária pelo nome)."""
+        return self._buscar(self.nome(i))
+
+    def _buscar(self, nome):
+        """Primeira posição de ordem cujo nome não é menor que nome."""
+        inicio, fim = 0, len(self.ordem)
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            if self.nome(self.ordem[meio]) < nome:
+                inicio = meio + 1
+            else:
+                fim = meio
+        return inicio
+
+    def _reler(self):
+        if not self._remoto and self._pacote and not self._watcher.files():
+            # pacote regravado por rename: o watcher perde o arquivo antigo
+            self._watcher.addPath(self.pasta)
+        # a cópia é feita aqui, onde o índice muda; só um pedido vale por vez
+        tarefa = partial(diferenca_pasta, self.pasta, bytes(self._dados), self._inicios[:], bytes(self._ativos))
+        self._renderizador.pedir("releitura", tarefa, self._aplicar)
+
+    def _aplicar(self, diferenca):
+        novos, reativados, removidos, tamanho = diferenca
+        if tamanho != len(self._ativos):
+            self._reler()  # o índice mudou enquanto a pasta era lida
+            return
+        for i in removidos:
+            self._ativos[i] = 0
+        for i in reativados:
+            self._ativos[i] = 1
+        self.ativos += len(reativados) - len(removidos)
+        adicionados = list(reativados)
+        for nome in novos:
+            i = self._acrescentar(nome)
+            self.ordem.insert(self._buscar(nome), i)
+            adicionados.append(i)
+        if adicionados or removidos:
+            self.mudou.emit(adicionados, removidos)
+
+
+def diferenca_pasta(pasta, dados, inicios, ativos):
+    """Relê a pasta e compara com uma cópia do índice (dados, inícios e
+    ativos de IndicePasta). Roda no pool: devolve (nomes novos em ordem
+    alfabética, ids que voltaram, ids removidos, número de ids da cópia)."""
+    atuais = set(listar_imagens(pasta))
+    reativados, removidos = [], []
+    for i in range(len(ativos)):
+        nome = dados[inicios[i]:inicios[i + 1]].decode("utf-8", "surrogateescape")
+        if nome in atuais:
+            atuais.discard(nome)
+            if not ativos[i]:
+                reativados.append(i)
+        elif ativos[i]:
+            removidos.append(i)
+    return sorted(atuais), reativados, removidos, len(ativos)
+
+
+class PermutacaoPreguicosa:
+    """Permutação pseudoaleatória de range(n) sem guardar a sequência.
+
+    Uma rede de Feistel embaralha os inteiros de um domínio potência de 2 que
+    contém n; valores fora de range(n) são reembaralhados (cycle walking)
+    até cair dentro. Memória constante e O(1) por item, qualquer que seja n.
+    """
+
+    RODADAS = 4
+
+    def __init__(self, n, rng):
+        self.n = n
+        bits = max(2, (max(n, 1) - 1).bit_length())
+        self._meia = (bits + 1) // 2
+        self._mascara = (1 << self._meia) - 1
+        self._chaves = [rng.getrandbits(64) for _ in range(self.RODADAS)]
+
+    def _misturar(self, v):
+        v = (v * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        return v ^ (v >> 31)
+
+    def __getitem__(self, i):
+        x = i
+        while True:
+            esquerda, direita = x >> self._meia, x & self._mascara
+            for chave in self._chaves:
+                esquerda, direita = direita, esquerda ^ (self._misturar(direita ^ chave) & self._mascara)
+            x = (esquerda << self._meia) | direita
+            if x < self.n:
+                return x
+
+
+class OrdemSlideshow:
+    """Sequência das imagens de um IndicePasta, alfabética ou aleatória.
+
+    Na ordem alfabética o próximo é o id ativo seguinte em indice.ordem. Na
+    aleatória cada ciclo é uma PermutacaoPreguicosa dos ids que existiam no
+    início dele; ids inativos são pulados. O próximo item é sorteado quando
+    proximo() é chamado e guardado, então proximo() sempre diz o que
+    avancar() vai devolver, mesmo depois de arquivos novos. O primeiro item
+    de um ciclo novo nunca repete o último do anterior.
+
+    Arquivos novos entram sem perder a posição: na ordem alfabética pelo
+    próprio índice; na aleatória em posições sorteadas entre os que ainda
+    faltam tocar neste ciclo.
+    """
+
+    def __init__(self, indice, aleatoria=False, rng=None):
+        self.indice = indice
+        self.aleatoria = aleatoria
+        self.rng = rng or random.Random()
+        self._atual = None      # id em exibição
+        self._planejado = None  # id que avancar() vai devolver
+        self._permutacao = None
+        self._posicao = 0       # próxima posição da permutação
+        self._extras = []       # ids que entraram durante o ciclo
+        self._evitar = None     # último do ciclo anterior
+        self._atual = self._sortear()
+
+    def __len__(self):
+        return self.indice.ativos
+
+    def atual(self):
+        return None if self._atual is None else self.indice.caminho(self._atual)
+
+    def proximo(self):
+        """Item que avancar() vai devolver, sem avançar."""
+        if self._planejado is None or not self.indice.ativo(self._planejado):
+            self._planejado = self._sortear()
+        return None if self._planejado is None else self.indice.caminho(self._planejado)
+
+    def avancar(self):
+        if self.proximo() is None:
+            return None
+        self._atual, self._planejado = self._planejado, None
+        return self.atual()
+
+    def adicionar(self, ids):
+        """Ids novos no índice. Removidos não precisam de aviso: ficam inativos
+        e são pulados."""
+        if self.aleatoria and self._permutacao is not None:
+            self._extras.extend(i for i in ids if i >= self._permutacao.n)
+
+    def _sortear(self):
+        if not self.indice.ativos:
+            return None
+        if not self.aleatoria:
+            return self._seguinte_alfabetico()
+        while True:
+            restantes = (self._permutacao.n - self._posicao) if self._permutacao else 0
+            if restantes <= 0 and not self._extras:
+                self._permutacao = PermutacaoPreguicosa(len(self.indice), self.rng)
+                self._posicao = 0
+                self._evitar = self._atual
+                continue
+            if self.rng.randrange(restantes + len(self._extras)) < len(self._extras):
+                i = self._extras.pop(self.rng.randrange(len(self._extras)))
+            else:
+                i = self._permutacao[self._posicao]
+                self._posicao += 1
+            if not self.indice.ativo(i):
+                continue
+            if i == self._evitar and self.indice.ativos > 1:
+                self._extras.append(i)  # toca mais adiante no ciclo
+                continue
+            self._evitar = None
+            return i
+
+    def _seguinte_alfabetico(self):
+        ordem = self.indice.ordem
+        inicio = 0 if self._atual is None else self.indice.posicao_alfabetica(self._atual) + 1
+        for k in range(len(ordem)):
+            i = ordem[(inicio + k) % len(ordem)]
+            if self.indice.ativo(i) and (i != self._atual or self.indice.ativos == 1):
+                return i
+        return None
+
+
+class FasesSlideshow:
+    """Fase de cada slideshow dentro do próprio intervalo, para que as janelas
+    não troquem (e decodifiquem a próxima imagem) no mesmo instante.
+
+    As trocas de uma janela caem em fase + k * intervalo no relógio de parede,
+    então a fase guardada no config.json mantém o escalonamento entre
+    execuções. Uma janela nova recebe a fase, em passos de PASSO_MS, que fica
+    mais longe das trocas das outras: duas janelas com intervalos a e b se
+    encontram a cada mdc(a, b), e a distância é medida nesse ciclo. A busca
+    fica num período comum a esses ciclos, com no máximo MAXIMO_CANDIDATOS
+    pontos em grade mais os pontos médios entre as fases das outras, então
+    um intervalo de uma hora não percorre 72 mil passos por janela.
+    """
+
+    PASSO_MS = 50
+    MAXIMO_CANDIDATOS = 200
+
+    def __init__(self):
+        self._fases = {}  # nome -> (intervalo em ms, fase em ms)
+
+    def atribuir(self, nome, intervalo_ms, fase_ms=None):
+        """Fase da janela: a guardada, se ainda couber no intervalo, senão a
+        mais afastada das outras."""
+        self._fases.pop(nome, None)
+        if fase_ms is None or not 0 <= fase_ms < intervalo_ms:
+            fase_ms = self._escolher(intervalo_ms)
+        self._fases[nome] = (intervalo_ms, fase_ms)
+        return fase_ms
+
+    def remover(self, nome):
+        self._fases.pop(nome, None)
+
+    def _escolher(self, intervalo_ms):
+        if not self._fases:
+            return 0
+        # a distância a cada janela se repete a cada mdc dos intervalos: basta um período comum
+        periodo = 1
+        for outro_intervalo, _ in self._fases.values():
+            periodo = math.lcm(periodo, math.gcd(intervalo_ms, outro_intervalo))
+        passo = self.PASSO_MS * max(1, periodo // (self.PASSO_MS * self.MAXIMO_CANDIDATOS))
+        pontos = sorted({outra % periodo for _, outra in self._fases.values()})
+        meios = ((a + b) // 2 % periodo for a, b in zip(pontos, pontos[1:] + [pontos[0] + periodo]))
+        candidatos = set(range(0, periodo, passo)) | {m - m % self.PASSO_MS for m in meios}
+        melhor, maior = 0, -1
+        for fase in sorted(candidatos):
+            menor = min((self._distancia(fase, intervalo_ms, outra, outro_intervalo)
+                         for outro_intervalo, outra in self._fases.values()), default=intervalo_ms)
+            if menor > maior:
+                melhor, maior = fase, menor
+        return melhor
+
+    @staticmethod
+    def _distancia(fase, intervalo, outra, outro_intervalo):
+        ciclo = math.gcd(intervalo, outro_intervalo)
+        d = (fase - outra) % ciclo
+        return min(d, ciclo - d)
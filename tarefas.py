@@ -0,0 +1,79 @@
+"""
+Tarefas fora da thread da interface do Vaporwave Windows
+Decodificação e escala das fontes rodam no QThreadPool global; a thread da
+interface só recebe as QImages prontas e troca o que o overlay pinta
+"""
+
+import logging
+from functools import partial
+
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+logger = logging.getLogger(__name__)
+
+
+class Renderizador(QObject):
+    """Fila de trabalhos de uma janela, separada por canal ("fonte", "quadro", ...).
+
+    Cada canal tem no máximo uma tarefa rodando e uma pendente: um pedido novo
+    substitui o pendente, então quadros atrasados são descartados quando a
+    janela fica para trás, e o resultado de uma tarefa que envelheceu enquanto
+    rodava é ignorado. Os callbacks rodam sempre na thread da interface.
+    """
+
+    concluida = Signal(str, int, object, object)  # canal, número, resultado, erro
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._numeros = {}      # canal -> número do pedido mais recente
+        self._rodando = {}      # canal -> callback da tarefa em execução
+        self._pendentes = {}    # canal -> (número, função, callback)
+        self.concluida.connect(self._concluida)
+
+    def pedir(self, canal, funcao, ao_concluir):
+        """Agenda funcao() numa thread do pool; ao_concluir(resultado) roda
+        na thread da interface se o pedido ainda for o mais recente do canal."""
+        numero = self._numeros.get(canal, 0) + 1
+        self._numeros[canal] = numero
+        item = (numero, funcao, ao_concluir)
+        if canal in self._rodando:
+            self._pendentes[canal] = item
+        else:
+            self._iniciar(canal, item)
+
+    def cancelar(self, canal):
+        """Descarta o pendente e invalida o que estiver rodando no canal."""
+        self._numeros[canal] = self._numeros.get(canal, 0) + 1
+        self._pendentes.pop(canal, None)
+
+    def ocupado(self, canal):
+        return canal in self._rodando
+
+    def _iniciar(self, canal, item):
+        numero, funcao, ao_concluir = item
+        self._rodando[canal] = ao_concluir
+        self.pool.start(partial(self._executar, canal, numero, funcao))
+
+    def _executar(self, canal, numero, funcao):
+        """Roda numa thread do pool; o sinal entrega o resultado na thread da interface."""
+        try:
+            resultado, erro = funcao(), None
+        except Exception as e:
+            resultado, erro = None, e
+        try:
+            self.concluida.emit(canal, numero, resultado, erro)
+        except RuntimeError:
+            pass  # a janela foi fechada enquanto a tarefa rodava
+
+    def _concluida(self, canal, numero, resultado, erro):
+        ao_concluir = self._rodando.pop(canal)
+        if numero == self._numeros.get(canal):  # pedidos velhos são descartados
+            if erro is not None:
+                logger.warning(f"Falha na tarefa '{canal}': {erro}")
+            else:
+                ao_concluir(resultado)
+        # o pendente só começa depois do callback, que pode trocar o que o overlay pinta
+        pendente = self._pendentes.pop(canal, None)
+        if pendente:
+            self._iniciar(canal, pendente)
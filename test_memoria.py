@@ -0,0 +1,160 @@
+"""
+Teste de memória da reprodução de GIFs
+Depois do aquecimento, tocar o GIF não pode acumular memória: os quadros
+saem do cache de quadros ou são decodificados à frente nos buffers
+reutilizáveis do anel da janela. Os pixels das QImages ficam no heap do Qt,
+fora do alcance do tracemalloc, então o teste olha o RSS do processo e os
+próprios buffers do anel
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+projeto_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, projeto_path)
+
+from PIL import Image, ImageDraw
+from PySide6.QtWidgets import QApplication
+
+import main
+
+QUADROS = 12
+AQUECIMENTO_S = 2.0
+MEDICAO_S = 2.0
+LIMITE_CRESCIMENTO = 8 * 1024 * 1024  # bytes de RSS; um quadro escalado tem ~370 KiB
+
+
+def _criar_arquivos(pasta):
+    template = Image.new("RGBA", (480, 360), (40, 40, 40, 255))
+    ImageDraw.Draw(template).rectangle((60, 50, 420, 310), fill=(0, 255, 0, 255))
+    caminho_template = os.path.join(pasta, "template.png")
+    template.save(caminho_template)
+
+    quadros = [Image.new("RGB", (640, 480), (i * 20, 80, 255 - i * 20)) for i in range(QUADROS)]
+    caminho_gif = os.path.join(pasta, "anim.gif")
+    quadros[0].save(caminho_gif, save_all=True, append_images=quadros[1:], duration=20, loop=0)
+    return caminho_template, caminho_gif
+
+
+def _rss():
+    """Memória residente do processo em bytes (Linux: /proc; senão psutil, se houver)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class ObservadorAnel:
+    """Acompanha os buffers que passam pelo anel da janela: quais QImages
+    (pela parte de cacheKey() que identifica os pixels, não o conteúdo)
+    entram em colocar() e se prontos + livres passam da capacidade."""
+
+    def __init__(self, anel):
+        self.anel = anel
+        self.buffers = set()
+        self.excessos = 0
+        colocar, devolver = anel.colocar, anel.devolver
+
+        def colocar_observado(numero, quadro, atraso):
+            self.buffers.add(quadro.cacheKey() >> 32)
+            colocar(numero, quadro, atraso)
+            self._verificar(quadro)
+
+        def devolver_observado(quadro):
+            devolver(quadro)
+            self._verificar(quadro)
+
+        anel.colocar, anel.devolver = colocar_observado, devolver_observado
+
+    def _verificar(self, quadro):
+        if len(self.anel._prontos) + len(self.anel._livres) > self.anel.capacidade(quadro.width(), quadro.height()):
+            self.excessos += 1
+
+
+def _rodar(app, segundos, janela):
+    fim = time.monotonic() + segundos
+    while time.monotonic() < fim:
+        app.processEvents()
+        janela.overlay.grab()  # força o paintEvent do overlay
+
+
+def _esperar_decodificacao(app, janela):
+    """Um quadro sendo decodificado no pool segura os bytes da imagem de
+    origem; as medidas são tiradas sem nenhum em andamento."""
+    while janela.renderizador.ocupado("quadro"):
+        app.processEvents()
+
+
+def medir_crescimento(app, janela, anel=None):
+    """(crescimento do RSS em bytes, buffers novos no anel, vezes que o anel
+    passou da capacidade) durante a reprodução estável."""
+    _rodar(app, AQUECIMENTO_S, janela)
+    _esperar_decodificacao(app, janela)
+    antes = _rss()
+    conhecidos = set(anel.buffers) if anel else set()
+    _rodar(app, MEDICAO_S, janela)
+    _esperar_decodificacao(app, janela)
+    depois = _rss()
+    crescimento = 0 if antes is None or depois is None else depois - antes
+    if anel is None:
+        return crescimento, 0, 0
+    return crescimento, len(anel.buffers - conhecidos), anel.excessos
+
+
+def medir_cenarios(app):
+    """Medidas com o cache de quadros e, depois, com todo quadro passando
+    pelo anel de buffers reutilizáveis (cache com limite zero)."""
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_template, caminho_gif = _criar_arquivos(pasta)
+        main.cache_disco = main.CacheDisco(os.path.join(pasta, "cache"), main.LIMITE_CACHE_DISCO)
+        janela = main.JanelaComChroma("teste", {
+            "caminho_template": caminho_template,
+            "caminho_imagem": caminho_gif,
+        })
+        resultados = [("com cache de quadros", *medir_crescimento(app, janela))]
+        janela.cache_quadros.limite_bytes = 0
+        janela._carregar_fonte(caminho_gif)
+        anel = ObservadorAnel(janela.buffer_quadros)
+        resultados.append(("sem cache (anel de buffers)", *medir_crescimento(app, janela, anel)))
+        janela.timer_quadros.stop()
+    return resultados
+
+
+def _aprovado(crescimento, novos, excessos):
+    return crescimento < LIMITE_CRESCIMENTO and novos == 0 and excessos == 0
+
+
+def test_memoria_estavel_gif():
+    app = QApplication.instance() or QApplication(sys.argv)
+    for descricao, crescimento, novos, excessos in medir_cenarios(app):
+        assert crescimento < LIMITE_CRESCIMENTO, f"{descricao}: RSS cresceu {crescimento} bytes"
+        assert novos == 0, f"{descricao}: {novos} buffers novos em vez de reaproveitados"
+        assert excessos == 0, f"{descricao}: anel passou da capacidade {excessos} vez(es)"
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+
+    print("=" * 60)
+    print("TESTE DE MEMÓRIA - REPRODUÇÃO DE GIF")
+    print("=" * 60)
+
+    falhou = False
+    for descricao, crescimento, novos, excessos in medir_cenarios(app):
+        ok = _aprovado(crescimento, novos, excessos)
+        falhou |= not ok
+        print(f"    {'✓' if ok else '✗'} {descricao}: RSS {crescimento / 1024:+.0f} KiB em {MEDICAO_S:.0f}s, "
+              f"{novos} buffer(s) novo(s), {excessos} excesso(s) do anel")
+
+    print("=" * 60)
+    sys.exit(1 if falhou else 0)
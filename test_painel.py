@@ -51,7 +51,7 @@ for pasta in pastas_esperadas:
 
 # Teste 4: Validar sintaxe dos arquivos principais
 print("\n[4/4] Validando sintaxe Python...")
-arquivos = ["main.py", "painel.py", "animacoes.py"]
+arquivos = ["main.py", "painel.py", "animacoes.py", "cache.py", "renderizacao.py", "tarefas.py", "slideshow.py", "fontes_animadas.py", "pacotes.py", "remoto.py", "relogio.py", "visibilidade.py", "orcamento.py", "persistencia.py"]
 for arquivo in arquivos:
     caminho = os.path.join(projeto_path, arquivo)
     if os.path.exists(caminho):
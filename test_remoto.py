@@ -0,0 +1,195 @@
+"""
+Teste da fonte HTTP
+Um servidor local faz o papel do host de mídia: o manifesto é lido, as
+conexões keep-alive são reaproveitadas, a revalidação usa ETag e o cache em
+disco continua servindo quando o servidor sai do ar
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+projeto_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, projeto_path)
+
+from PIL import Image
+from PySide6.QtWidgets import QApplication
+
+import remoto
+from slideshow import IndicePasta
+
+
+def _png(cor):
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 24), cor).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class ServidorMidia:
+    """Servidor HTTP/1.1 em memória que responde 304 a If-None-Match."""
+
+    def __init__(self, arquivos):
+        self.arquivos = arquivos
+        self.respostas = []   # (caminho, status)
+        self.conexoes = set()
+        servidor = self
+
+        class Tratador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                servidor.conexoes.add(self.client_address)
+                dados = servidor.arquivos.get(self.path)
+                if dados is None:
+                    status, dados, etag = 404, b"", None
+                else:
+                    etag = '"%s"' % hashlib.sha1(dados).hexdigest()
+                    status = 304 if self.headers.get("If-None-Match") == etag else 200
+                servidor.respostas.append((self.path, status))
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0" if status == 304 else str(len(dados)))
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), Tratador)
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}"
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+
+    def parar(self):
+        self.http.shutdown()
+        self.http.server_close()
+
+
+def _preparar(pasta):
+    arquivos = {
+        "/manifesto.json": json.dumps({"imagens": ["a.png", "sub/b.png", "notas.txt"]}).encode(),
+        "/a.png": _png((255, 0, 0)),
+        "/sub/b.png": _png((0, 0, 255)),
+    }
+    remoto.cache_http = remoto.CacheHttp(os.path.join(pasta, "http"))
+    return ServidorMidia(arquivos)
+
+
+def verificar_cache(pasta):
+    servidor = _preparar(pasta)
+    cache = remoto.cache_http
+    try:
+        urls = remoto.ler_manifesto(servidor.url + "/manifesto.json")
+        assert urls[:2] == [servidor.url + "/a.png", servidor.url + "/sub/b.png"], urls
+
+        locais = [cache.baixar(u) for u in urls[:2]]
+        assert Image.open(locais[0]).getpixel((0, 0)) == (255, 0, 0)
+        assert cache.pool.abertas == 1 and len(servidor.conexoes) == 1, "keep-alive não reaproveitado"
+
+        # dentro da validade não vai à rede; com validade zero revalida e recebe 304
+        total = len(servidor.respostas)
+        cache.baixar(urls[0])
+        assert len(servidor.respostas) == total
+        assert cache.baixar(urls[0], validade_s=0) == locais[0]
+        assert servidor.respostas[-1] == ("/a.png", 304)
+
+        # conteúdo novo no servidor: ETag muda e o arquivo local é trocado
+        servidor.arquivos["/a.png"] = _png((0, 255, 0))
+        cache.baixar(urls[0], validade_s=0)
+        assert servidor.respostas[-1] == ("/a.png", 200)
+        assert Image.open(locais[0]).getpixel((0, 0)) == (0, 255, 0)
+    finally:
+        servidor.parar()
+
+    # sem servidor a cópia em cache continua servindo
+    assert cache.baixar(urls[0], validade_s=0) == locais[0]
+    return True
+
+
+def verificar_limite(pasta):
+    """Passando do limite, sai o arquivo usado há mais tempo (e seu .meta)."""
+    servidor = _preparar(pasta)
+    cache = remoto.cache_http
+    try:
+        urls = [servidor.url + "/a.png", servidor.url + "/sub/b.png"]
+        cache.limite_bytes = len(servidor.arquivos["/a.png"]) + len(servidor.arquivos["/sub/b.png"])
+        locais = [cache.baixar(u) for u in urls]
+        cache.baixar(urls[0])  # a.png passa a ser a mais recente
+        servidor.arquivos["/c.png"] = _png((0, 255, 0))
+        novo = cache.baixar(servidor.url + "/c.png")
+        assert os.path.exists(novo) and os.path.exists(locais[0])
+        assert not os.path.exists(locais[1]), "o arquivo menos usado não saiu do cache"
+        assert not os.path.exists(os.path.splitext(locais[1])[0] + ".meta")
+        assert cache.bytes_usados <= cache.limite_bytes
+        # o índice relido do disco (outra execução) enxerga o mesmo total
+        relido = remoto.CacheHttp(cache.pasta)
+        relido._carregar_indice()
+        assert relido.bytes_usados == cache.bytes_usados
+    finally:
+        servidor.parar()
+    return True
+
+
+def verificar_indice(app, pasta):
+    """O manifesto é lido no pool: o índice nasce vazio e se preenche depois."""
+    servidor = _preparar(pasta)
+    try:
+        inicio = time.monotonic()
+        indice = IndicePasta(servidor.url + "/manifesto.json")
+        criado_em = time.monotonic() - inicio
+        assert indice.ativos == 0
+        recebidos = []
+        indice.mudou.connect(lambda adicionados, removidos: recebidos.append(adicionados))
+        fim = time.monotonic() + 5
+        while not recebidos and time.monotonic() < fim:
+            app.processEvents()
+        assert recebidos, "manifesto não chegou"
+        assert sorted(indice.caminho(i) for i in recebidos[0]) == [servidor.url + "/a.png", servidor.url + "/sub/b.png"]
+        return criado_em
+    finally:
+        servidor.parar()
+
+
+def test_cache_http():
+    with tempfile.TemporaryDirectory() as pasta:
+        assert verificar_cache(pasta)
+
+
+def test_limite_cache_http():
+    with tempfile.TemporaryDirectory() as pasta:
+        assert verificar_limite(pasta)
+
+
+def test_indice_manifesto():
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as pasta:
+        verificar_indice(app, pasta)
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+
+    print("=" * 60)
+    print("TESTE DA FONTE HTTP")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        verificar_cache(pasta)
+        print("    ✓ manifesto, keep-alive, revalidação por ETag e cópia offline")
+    with tempfile.TemporaryDirectory() as pasta:
+        verificar_limite(pasta)
+        print("    ✓ cache HTTP limitado, removendo o arquivo usado há mais tempo")
+    with tempfile.TemporaryDirectory() as pasta:
+        criado_em = verificar_indice(app, pasta)
+        print(f"    ✓ índice do manifesto preenchido no pool (criado em {criado_em * 1000:.1f} ms)")
+
+    print("=" * 60)
@@ -0,0 +1,99 @@
+"""
+Visibilidade das janelas do Vaporwave Windows
+Diz se uma janela está de fato aparecendo para alguém: numa tela que existe,
+não minimizada, não coberta por outras janelas e com a sessão em uso. Janelas
+que não aparecem pausam a animação e o slideshow. A cobertura e o estado da
+sessão vêm da API do Windows; nas outras plataformas contam como visíveis
+"""
+
+import ctypes
+import sys
+
+from PySide6.QtGui import QGuiApplication
+
+LIMITE_OCIOSO_MS = 10 * 60 * 1000  # sem teclado e mouse por esse tempo, a sessão conta como ociosa
+AMOSTRAS_COBERTURA = 3             # pontos por eixo testados na área da imagem
+
+_WINDOWS = sys.platform == "win32"
+
+if _WINDOWS:
+    from ctypes import wintypes
+
+    _user32 = ctypes.windll.user32
+    _kernel32 = ctypes.windll.kernel32
+    _user32.WindowFromPoint.restype = wintypes.HWND
+    _user32.WindowFromPoint.argtypes = [wintypes.POINT]
+    _user32.GetAncestor.restype = wintypes.HWND
+    _user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+    _user32.OpenInputDesktop.restype = wintypes.HANDLE
+    _GA_ROOT = 2
+    _DESKTOP_SWITCHDESKTOP = 0x0100
+    _SPI_GETSCREENSAVERRUNNING = 0x0072
+
+    class _LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+
+def sessao_ativa():
+    """False com a sessão bloqueada, o protetor de tela rodando ou o usuário
+    ausente há LIMITE_OCIOSO_MS."""
+    if not _WINDOWS:
+        return True
+    desktop = _user32.OpenInputDesktop(0, False, _DESKTOP_SWITCHDESKTOP)
+    if not desktop:
+        return False  # a área de trabalho de entrada é a tela de bloqueio
+    _user32.CloseDesktop(desktop)
+    rodando = wintypes.BOOL()
+    if _user32.SystemParametersInfoW(_SPI_GETSCREENSAVERRUNNING, 0, ctypes.byref(rodando), 0) and rodando.value:
+        return False
+    info = _LASTINPUTINFO(ctypes.sizeof(_LASTINPUTINFO))
+    if _user32.GetLastInputInfo(ctypes.byref(info)):
+        ocioso = (_kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+        if ocioso > LIMITE_OCIOSO_MS:
+            return False
+    return True
+
+
+def em_alguma_tela(janela):
+    """A janela cruza a geometria de alguma tela conectada (um monitor
+    desconectado deixa janelas em posições como x = -844)."""
+    geometria = janela.frameGeometry()
+    return any(tela.geometry().intersects(geometria) for tela in QGuiApplication.screens())
+
+
+def coberta(janela, area):
+    """Todos os pontos amostrados da área (coordenadas da janela) caem em
+    outras janelas. Pixels transparentes de uma janela em camadas não
+    contam para ela no teste de acerto, por isso a amostra é na área da imagem."""
+    if not _WINDOWS:
+        return False
+    hwnd = int(janela.winId())
+    retangulo = wintypes.RECT()
+    if not _user32.GetWindowRect(hwnd, ctypes.byref(retangulo)) or janela.width() <= 0 or janela.height() <= 0:
+        return False
+    # a área é convertida em proporção do retângulo nativo, que já está em
+    # pixels físicos qualquer que seja a escala do monitor
+    escala_x = (retangulo.right - retangulo.left) / janela.width()
+    escala_y = (retangulo.bottom - retangulo.top) / janela.height()
+    x0, y0, x1, y1 = area
+    for i in range(AMOSTRAS_COBERTURA):
+        for j in range(AMOSTRAS_COBERTURA):
+            x = x0 + (x1 - x0) * (2 * i + 1) / (2 * AMOSTRAS_COBERTURA)
+            y = y0 + (y1 - y0) * (2 * j + 1) / (2 * AMOSTRAS_COBERTURA)
+            ponto = wintypes.POINT(retangulo.left + round(x * escala_x), retangulo.top + round(y * escala_y))
+            achada = _user32.WindowFromPoint(ponto)
+            if achada and _user32.GetAncestor(achada, _GA_ROOT) == hwnd:
+                return False
+    return True
+
+
+def janela_visivel(janela, area):
+    """A janela aparece na tela: mostrada, não minimizada, exposta, numa tela
+    conectada e sem estar coberta. A sessão é verificada à parte, uma vez
+    para todas as janelas."""
+    if not janela.isVisible() or janela.isMinimized():
+        return False
+    handle = janela.windowHandle()
+    if handle is not None and not handle.isExposed():
+        return False
+    return em_alguma_tela(janela) and not coberta(janela, area)